@@ -1,51 +1,137 @@
+import asyncio
+import hashlib
 import json
-import requests
-from typing import Dict, Any
+import logging
+import time
+from typing import Dict, Any, AsyncIterator, List, NamedTuple, Optional, Tuple
 from .config import settings
+from .http_client import get_client, host_limit
+from .cache import LLMCache, get_llm_cache
+from .circuit_breaker import CircuitOpenError, get_breaker
+from .metrics import observe_upstream, record_llm_usage
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to a ~4 characters/token estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompt wording changes so cached sections from the old prompt are not reused
+PROMPT_VERSION = 3
+
+# Scoring fields that describe the stored cohort rather than the profile. They change whenever
+# anyone else is analysed, so they are kept out of the prompt and the cache key.
+COHORT_FIELDS = ("cohort", "benchmark_position")
+
+PROMPT_TEMPLATE = """Analyze the following GitHub profile signals and generate a recruiter-style report.
+
+GITHUB SIGNALS (JSON):
+{signals}
+
+RESUME TEXT (OPTIONAL):
+{resume}
+
+Generate the following sections in JSON format:
+1. "executive_summary": A professional executive summary of the candidate's engineering profile.
+2. "recruiter_reasoning": A 3-line concise recruiter-style reasoning for the hiring decision.
+3. "readme_evaluation": Qualitative feedback on the candidate's documentation.
+4. "resume_verification": Reasoning on whether the GitHub evidence supports the claims in the resume (if provided).
+5. "improvement_roadmap": {{"week1": "...", "week2": "...", "week3": "...", "week4": "..."}}
+
+STRICT JSON OUTPUT ONLY."""
+
+def profile_signals(signals: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in signals.items() if key not in COHORT_FIELDS}
+
+def canonical_json(value: Any) -> str:
+    """Key-sorted JSON without insignificant whitespace: stable for hashing and cheap in tokens."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+# Encoding per model, or None once loading it failed
+_encodings: Dict[str, Any] = {}
+
+def _encoding(model: str):
+    """
+    The model's tiktoken encoding. Encodings are downloaded on first use;
+    a failure is remembered as None so it isn't retried on every prompt.
+    """
+    if model not in _encodings:
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"No tiktoken encoding for {model}, estimating token counts: {str(e)}")
+            encoding = None
+        _encodings[model] = encoding
+    return _encodings[model]
+
+def count_tokens(text: str, model: str) -> int:
+    encoding = _encoding(model) if tiktoken is not None else None
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+def counts_are_exact(model: str) -> bool:
+    """Whether count_tokens uses the model's tokenizer rather than the ~4 characters/token estimate."""
+    return tiktoken is not None and _encoding(model) is not None
+
+class Provider(NamedTuple):
+    name: str
+    api_key: Optional[str]
+    model: str
+    url: str
+
+def provider_config(name: str) -> Provider:
+    name = name.strip().lower()
+    if name == "blackbox":
+        return Provider(name, settings.blackbox_api_key, settings.blackbox_model, settings.blackbox_api_url)
+    return Provider(name, settings.openai_api_key, settings.openai_model, settings.openai_api_url)
 
 class AIReasoningEngine:
-    def __init__(self):
-        self.provider = settings.ai_provider.lower()
-        
-        if self.provider == "blackbox":
-            self.api_key = settings.blackbox_api_key
-            self.model = settings.blackbox_model
-            self.url = "https://api.blackbox.ai/v1/chat/completions"
-        else:
-            self.api_key = settings.openai_api_key
-            self.model = settings.openai_model
-            self.url = "https://api.openai.com/v1/chat/completions"
-
-    def generate_report_sections(self, signals: Dict[str, Any], resume_text: str = "") -> Dict[str, Any]:
-        if not self.api_key:
-            return self._get_fallback_response(f"Missing API key for {self.provider}")
+    def __init__(self, cache: Optional[LLMCache] = None):
+        self.cache = cache or get_llm_cache()
+        self.provider, self.api_key, self.model, self.url = provider_config(settings.ai_provider)
+        self.hedge_providers = [provider_config(name) for name in settings.ai_hedge_providers.split(",")
+                                if name.strip()]
 
+    def providers(self) -> List[Provider]:
+        """AI_PROVIDER first, then the hedge providers, skipping any without an API key."""
+        primary = Provider(self.provider, self.api_key, self.model, self.url)
+        candidates = [primary] + [p for p in self.hedge_providers if p.name != primary.name]
+        return [p for p in candidates if p.api_key]
+
+    def cache_key(self, signals: Dict[str, Any], resume_text: str = "") -> str:
+        resume_hash = hashlib.sha256((resume_text or "").encode("utf-8")).hexdigest()
+        material = canonical_json([PROMPT_VERSION, self.provider, self.model, profile_signals(signals), resume_hash])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def build_prompt(self, signals: Dict[str, Any], resume_text: str = "") -> str:
+        signals = profile_signals(signals)
+        compact = canonical_json(signals)
+        prompt = PROMPT_TEMPLATE.format(signals=compact, resume=(resume_text or "").strip())
+        if logger.isEnabledFor(logging.INFO):
+            # The prompts differ only in the signals, so count those rather than a second whole prompt
+            after = count_tokens(prompt, self.model)
+            before = after - count_tokens(compact, self.model) + count_tokens(json.dumps(signals, indent=2), self.model)
+            method = "tiktoken" if counts_are_exact(self.model) else "estimated at ~4 characters/token"
+            logger.info(f"LLM prompt: {after} tokens ({before} with indented signals, "
+                        f"{100 * (before - after) / max(before, 1):.0f}% saved; {method})")
+        return prompt
+
+    def _request(self, provider: Provider, signals: Dict[str, Any], resume_text: str,
+                 stream: bool = False) -> Tuple[Dict, Dict]:
         headers = {
-            "Authorization": f"Bearer {self.api_key}",
+            "Authorization": f"Bearer {provider.api_key}",
             "Content-Type": "application/json"
         }
         
-        prompt = f"""
-        Analyze the following GitHub profile signals and generate a recruiter-style report.
-        
-        GITHUB SIGNALS:
-        {json.dumps(signals, indent=2)}
-        
-        RESUME TEXT (OPTIONAL):
-        {resume_text}
-        
-        Generate the following sections in JSON format:
-        1. "executive_summary": A professional executive summary of the candidate's engineering profile.
-        2. "recruiter_reasoning": A 3-line concise recruiter-style reasoning for the hiring decision.
-        3. "readme_evaluation": Qualitative feedback on the candidate's documentation.
-        4. "resume_verification": Reasoning on whether the GitHub evidence supports the claims in the resume (if provided).
-        5. "improvement_roadmap": {{"week1": "...", "week2": "...", "week3": "...", "week4": "..."}}
-        
-        STRICT JSON OUTPUT ONLY.
-        """
+        prompt = self.build_prompt(signals, resume_text)
 
         payload = {
-            "model": self.model,
+            "model": provider.model,
             "messages": [
                 {"role": "system", "content": "You are an expert technical recruiter and engineering manager."},
                 {"role": "user", "content": prompt}
@@ -53,27 +139,193 @@ class AIReasoningEngine:
         }
         
         # OpenAI requires response_format for JSON mode, Blackbox might not or might handle it differently
-        if self.provider == "openai":
+        if provider.name == "openai":
             payload["response_format"] = {"type": "json_object"}
+        if stream:
+            payload["stream"] = True
+            if provider.name == "openai":
+                # Token usage arrives in a final chunk only when asked for
+                payload["stream_options"] = {"include_usage": True}
+        return headers, payload
+
+    @staticmethod
+    def _parse_sections(data: str) -> Dict[str, Any]:
+        # Clean up response if it contains markdown code blocks
+        if "```json" in data:
+            data = data.split("```json")[1].split("```")[0].strip()
+        elif "```" in data:
+            data = data.split("```")[1].split("```")[0].strip()
+            
+        return json.loads(data)
+
+    def _describe_failure(self, e: Exception) -> Dict[str, Any]:
+        error_msg = str(e)
+        if hasattr(e, 'response') and e.response is not None:
+            error_msg = e.response.text
+        
+        return self._get_fallback_response(error_msg)
+
+    async def generate_report_sections(self, signals: Dict[str, Any], resume_text: str = "") -> Dict[str, Any]:
+        providers = self.providers()
+        if not providers:
+            return self._get_fallback_response(f"Missing API key for {self.provider}")
+
+        key = self.cache_key(signals, resume_text)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            sections = await asyncio.wait_for(self._race(providers, signals, resume_text),
+                                              settings.ai_latency_budget)
+        except asyncio.TimeoutError:
+            return self._get_fallback_response(f"No AI provider answered within {settings.ai_latency_budget:g}s")
+        except Exception as e:
+            return self._describe_failure(e)
+
+        if self.cache is not None:
+            self.cache.put(key, sections)
+        return sections
+
+    async def _race(self, providers: List[Provider], signals: Dict[str, Any], resume_text: str) -> Dict[str, Any]:
+        """
+        Ask providers in order, skipping any whose circuit is open. The next one
+        is started when the current ones fail or haven't answered within
+        AI_HEDGE_DELAY; the first valid result wins and the others are cancelled.
+        """
+        waiting = list(providers)
+        pending: Dict[asyncio.Future, str] = {}
+        errors: List[Exception] = []
+
+        def launch():
+            while waiting:
+                provider = waiting.pop(0)
+                if get_breaker(provider.name).allow():
+                    pending[asyncio.ensure_future(self._complete(provider, signals, resume_text))] = provider.name
+                    return
+                errors.append(CircuitOpenError(f"{provider.name} is failing; calls are paused"))
+
+        launch()
+        try:
+            while pending:
+                hedge_after = settings.ai_hedge_delay if waiting else None
+                done, _ = await asyncio.wait(pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for task in done:
+                    pending.pop(task)
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    return winners[0].result()
+                errors.extend(task.exception() for task in done)
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise errors[-1]
 
+    async def _complete(self, provider: Provider, signals: Dict[str, Any], resume_text: str) -> Dict[str, Any]:
+        """One chat completion, with its outcome and latency recorded on the provider's breaker."""
+        headers, payload = self._request(provider, signals, resume_text)
+        breaker = get_breaker(provider.name)
+        started = time.perf_counter()
         try:
-            response = requests.post(self.url, headers=headers, json=payload, timeout=30)
+            async with host_limit(provider.url):
+                response = await get_client().post(provider.url, headers=headers, json=payload,
+                                                   timeout=settings.ai_latency_budget)
+            observe_upstream(provider.name, "chat_completions", response.status_code, time.perf_counter() - started)
             response.raise_for_status()
-            data = response.json()["choices"][0]["message"]["content"]
-            
-            # Clean up response if it contains markdown code blocks
-            if "```json" in data:
-                data = data.split("```json")[1].split("```")[0].strip()
-            elif "```" in data:
-                data = data.split("```")[1].split("```")[0].strip()
-                
-            return json.loads(data)
+            body = response.json()
+            record_llm_usage(provider.name, body.get("usage"))
+            sections = self._parse_sections(body["choices"][0]["message"]["content"])
+        except asyncio.CancelledError:
+            # Lost a hedge race or ran out of budget; only count it against the provider if already slow
+            elapsed = time.perf_counter() - started
+            if elapsed >= breaker.slow_seconds:
+                breaker.record(False, elapsed)
+            else:
+                breaker.release()
+            raise
+        except Exception:
+            breaker.record(False, time.perf_counter() - started)
+            raise
+        breaker.record(True, time.perf_counter() - started)
+        return sections
+
+    async def stream_report_sections(self, signals: Dict[str, Any],
+                                     resume_text: str = "") -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Like generate_report_sections, but uses the provider's streaming mode.
+        Yields ("delta", text) for each content chunk as it arrives, then
+        exactly one ("sections", dict) with the parsed result or the fallback.
+        Streams are not hedged (deltas can't be retracted), so this uses the
+        first provider whose circuit is closed.
+        """
+        providers = self.providers()
+        if not providers:
+            yield "sections", self._get_fallback_response(f"Missing API key for {self.provider}")
+            return
+
+        key = self.cache_key(signals, resume_text)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield "sections", cached
+                return
+
+        provider = next((p for p in providers if get_breaker(p.name).allow()), None)
+        if provider is None:
+            yield "sections", self._get_fallback_response(
+                f"{', '.join(p.name for p in providers)} failing; calls are paused")
+            return
+
+        headers, payload = self._request(provider, signals, resume_text, stream=True)
+        breaker = get_breaker(provider.name)
+        deadline = time.monotonic() + settings.ai_latency_budget
+        parts: List[str] = []
+        started = time.perf_counter()
+        try:
+            async with host_limit(provider.url):
+                async with get_client().stream("POST", provider.url, headers=headers, json=payload,
+                                               timeout=settings.ai_latency_budget) as response:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"{provider.name} did not finish within "
+                                               f"{settings.ai_latency_budget:g}s")
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        record_llm_usage(provider.name, chunk.get("usage"))
+                        for choice in chunk.get("choices") or []:
+                            text = (choice.get("delta") or {}).get("content")
+                            if text:
+                                parts.append(text)
+                                yield "delta", text
+            observe_upstream(provider.name, "chat_completions", response.status_code,
+                             time.perf_counter() - started)
+            sections = self._parse_sections("".join(parts))
         except Exception as e:
-            error_msg = str(e)
-            if hasattr(e, 'response') and e.response is not None:
-                error_msg = e.response.text
-            
-            return self._get_fallback_response(error_msg)
+            breaker.record(False, time.perf_counter() - started)
+            yield "sections", self._describe_failure(e)
+            return
+        except BaseException:
+            # The consumer went away mid-stream; that says nothing about the provider
+            breaker.release()
+            raise
+
+        breaker.record(True, time.perf_counter() - started)
+        if self.cache is not None:
+            self.cache.put(key, sections)
+        yield "sections", sections
 
     def _get_fallback_response(self, error_msg: str) -> Dict[str, Any]:
         summary = f"Error generating content with {self.provider}."
@@ -0,0 +1,320 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, NamedTuple, Hashable, Tuple
+from urllib.parse import urlencode
+from .config import settings
+from .features import FEATURE_VERSION
+from .models import Repo
+
+# Endpoint families used to pick a TTL; first match wins.
+ENDPOINT_TYPES = [
+    ("languages", re.compile(r"^repos/[^/]+/[^/]+/languages$")),
+    ("contents", re.compile(r"^repos/[^/]+/[^/]+/contents(/.*)?$")),
+    ("trees", re.compile(r"^repos/[^/]+/[^/]+/git/trees/.+$")),
+    ("commits", re.compile(r"^repos/[^/]+/[^/]+/commits$")),
+    ("pulls", re.compile(r"^repos/[^/]+/[^/]+/pulls$")),
+    ("issues", re.compile(r"^repos/[^/]+/[^/]+/issues$")),
+    ("releases", re.compile(r"^repos/[^/]+/[^/]+/releases$")),
+    ("repos", re.compile(r"^users/[^/]+/repos$")),
+    ("user", re.compile(r"^users/[^/]+$")),
+    ("graphql", re.compile(r"^graphql(/|$)")),
+]
+
+def evict_lru(conn: sqlite3.Connection, table: str, size: int, max_bytes: int, stats: Dict[str, int]) -> int:
+    """
+    Delete the least recently used rows of `table` (key, size, accessed_at)
+    until `size` fits in max_bytes, in batches; returns the new size.
+    """
+    while size > max_bytes:
+        rows = conn.execute(f"SELECT key, size FROM {table} ORDER BY accessed_at LIMIT 64").fetchall()
+        if not rows:
+            return 0
+        for key, row_size in rows:
+            conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+            size -= row_size
+            stats["evictions"] += 1
+            if size <= max_bytes:
+                break
+    return size
+
+def endpoint_type(endpoint: str) -> str:
+    """Classify a GitHub endpoint into one of ENDPOINT_TYPES, or "default"."""
+    endpoint = endpoint.strip("/")
+    for kind, pattern in ENDPOINT_TYPES:
+        if pattern.match(endpoint):
+            return kind
+    return "default"
+
+class CacheEntry(NamedTuple):
+    body: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    link: Optional[str]
+    fresh: bool
+
+class ResponseCache:
+    """
+    SQLite-backed cache for GitHub API responses.
+    Entries expire per endpoint type, stale entries are revalidated with
+    If-None-Match / If-Modified-Since, and the least recently used entries
+    are evicted once the cache grows past max_bytes.
+    """
+    def __init__(self, path: str, max_bytes: int, ttls: Dict[str, int]):
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, link TEXT, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "link" not in columns:
+            # Caches created before pagination support
+            self._conn.execute("ALTER TABLE responses ADD COLUMN link TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        endpoint = endpoint.strip("/")
+        if not params:
+            return endpoint
+        return f"{endpoint}?{urlencode(sorted(params.items()))}"
+
+    def ttl_for(self, endpoint: str) -> int:
+        return self.ttls.get(endpoint_type(endpoint), self.ttls.get("default", 0))
+
+    def get(self, endpoint: str, params: Optional[Dict] = None) -> Optional[CacheEntry]:
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, link, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+        body, etag, last_modified, link, stored_at = row
+        fresh = now - stored_at < self.ttl_for(endpoint)
+        self.stats["hits" if fresh else "stale"] += 1
+        return CacheEntry(json.loads(body), etag, last_modified, link, fresh)
+
+    def put(self, endpoint: str, params: Optional[Dict], body: bytes,
+            etag: Optional[str] = None, last_modified: Optional[str] = None, link: Optional[str] = None):
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, link, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, link, now, now, len(body))
+            )
+            self._size += len(body) - (old[0] if old else 0)
+            self.stats["stores"] += 1
+            self._size = evict_lru(self._conn, "responses", self._size, self.max_bytes, self.stats)
+
+    def mark_revalidated(self, endpoint: str, params: Optional[Dict] = None):
+        """A 304 reply confirmed the cached body; restart its TTL."""
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+        self.stats["revalidated"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {**self.stats, "entries": entries, "size_bytes": self._size, "max_bytes": self.max_bytes}
+
+class LLMCache:
+    """
+    SQLite-backed cache for AI report sections, keyed by a content hash of
+    everything that shapes the prompt. Entries older than ttl are treated as
+    misses and the least recently used ones are evicted past max_bytes.
+    """
+    def __init__(self, path: str, ttl: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_results ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, stored_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_results_accessed ON llm_results(accessed_at)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_results").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT body, stored_at, size FROM llm_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            body, stored_at, size = row
+            if now - stored_at >= self.ttl:
+                self._conn.execute("DELETE FROM llm_results WHERE key = ?", (key,))
+                self._size -= size
+                self.stats["expired"] += 1
+                return None
+            self._conn.execute("UPDATE llm_results SET accessed_at = ? WHERE key = ?", (now, key))
+        self.stats["hits"] += 1
+        return json.loads(body)
+
+    def put(self, key: str, sections: Dict[str, Any]):
+        body = json.dumps(sections, separators=(",", ":")).encode("utf-8")
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM llm_results WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_results (key, body, stored_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, body, now, now, len(body))
+            )
+            self._size += len(body) - (old[0] if old else 0)
+            self.stats["stores"] += 1
+            self._size = evict_lru(self._conn, "llm_results", self._size, self.max_bytes, self.stats)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_results").fetchone()[0]
+        return {**self.stats, "entries": entries, "size_bytes": self._size, "max_bytes": self.max_bytes}
+
+class RepoSnapshot(NamedTuple):
+    pushed_at: Optional[str]
+    updated_at: Optional[str]
+    head_sha: Optional[str]
+    features: Dict[str, Any]
+    stored_at: float
+
+class RepoSnapshotCache:
+    """
+    Per-repository feature rows from the last detailed fetch, tagged with the
+    listing's pushed_at/updated_at and the head commit SHA at the time. A repo
+    whose listing timestamps and head commit still match, and whose row is
+    younger than max_age, is scored from its row instead of being fetched again.
+    """
+    def __init__(self, path: str, max_age: int):
+        self.max_age = max_age
+        self.stats = {"reused": 0, "refreshed": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS repo_snapshots ("
+            "owner TEXT NOT NULL, name TEXT NOT NULL, pushed_at TEXT, updated_at TEXT, head_sha TEXT, "
+            "features BLOB NOT NULL, stored_at REAL NOT NULL, PRIMARY KEY (owner, name))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_repo_snapshots_stored ON repo_snapshots(stored_at)")
+
+    def get_many(self, owner: str, names: List[str]) -> Dict[str, RepoSnapshot]:
+        if not names:
+            return {}
+        placeholders = ", ".join("?" for _ in names)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, pushed_at, updated_at, head_sha, features, stored_at FROM repo_snapshots "
+                f"WHERE owner = ? AND name IN ({placeholders})", [owner.lower(), *names]
+            ).fetchall()
+        return {row[0]: RepoSnapshot(row[1], row[2], row[3], json.loads(row[4]), row[5]) for row in rows}
+
+    def is_current(self, snapshot: RepoSnapshot, repo: Repo, head_sha: Optional[str] = None) -> bool:
+        """Whether the row still describes repo; head_sha, when known, must match the stored head too."""
+        return (
+            snapshot.features.get("version") == FEATURE_VERSION
+            and time.time() - snapshot.stored_at < self.max_age
+            and snapshot.pushed_at == repo.pushed_at
+            and snapshot.updated_at == repo.updated_at
+            and (head_sha is None or snapshot.head_sha == head_sha)
+        )
+
+    def put_many(self, owner: str, entries: List[Tuple[str, Optional[str], Optional[str], Optional[str], Dict]]):
+        """Store (name, pushed_at, updated_at, head_sha, features) rows and drop expired ones."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO repo_snapshots "
+                "(owner, name, pushed_at, updated_at, head_sha, features, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(owner.lower(), name, pushed_at, updated_at, head_sha,
+                  json.dumps(features, separators=(",", ":")), now)
+                 for name, pushed_at, updated_at, head_sha, features in entries]
+            )
+            self._conn.execute("DELETE FROM repo_snapshots WHERE stored_at < ?", (now - self.max_age,))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM repo_snapshots").fetchone()[0]
+        return {**self.stats, "entries": entries, "max_age": self.max_age}
+
+class TTLCache:
+    """Small in-memory cache with per-entry expiry and LRU eviction."""
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> Optional[ResponseCache]:
+    global _response_cache
+    if not settings.github_cache_enabled:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            settings.cache_path,
+            settings.github_cache_max_mb * 1024 * 1024,
+            settings.github_cache_ttls,
+        )
+    return _response_cache
+
+_llm_cache: Optional[LLMCache] = None
+
+def get_llm_cache() -> Optional[LLMCache]:
+    global _llm_cache
+    if not settings.llm_cache_enabled:
+        return None
+    if _llm_cache is None:
+        _llm_cache = LLMCache(settings.cache_path, settings.llm_cache_ttl, settings.llm_cache_max_mb * 1024 * 1024)
+    return _llm_cache
+
+_snapshot_cache: Optional[RepoSnapshotCache] = None
+
+def get_snapshot_cache() -> Optional[RepoSnapshotCache]:
+    global _snapshot_cache
+    if not settings.repo_snapshots_enabled:
+        return None
+    if _snapshot_cache is None:
+        _snapshot_cache = RepoSnapshotCache(settings.cache_path, settings.repo_snapshot_max_age)
+    return _snapshot_cache
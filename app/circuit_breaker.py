@@ -0,0 +1,82 @@
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from .config import settings
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    """
+    Rolling-window health of one upstream. Once at least min_calls of the
+    last `window` calls are recorded and the share that failed (or took
+    longer than slow_seconds) reaches failure_ratio, the breaker opens and
+    callers are refused for `cooldown` seconds. After that it is half-open:
+    one trial call goes through, and its outcome closes or re-opens it.
+    """
+    def __init__(self, name: str, window: int, failure_ratio: float, slow_seconds: float,
+                 cooldown: float, min_calls: int = 5):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.slow_seconds = slow_seconds
+        self.cooldown = cooldown
+        self.min_calls = min_calls
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; a True from a half-open breaker reserves the trial call."""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record(self, ok: bool, seconds: float):
+        healthy = ok and seconds < self.slow_seconds
+        if self.state == "half_open":
+            self._probe_in_flight = False
+            if healthy:
+                self._outcomes.clear()
+                self.state = "closed"
+            else:
+                self._open()
+            return
+        self._outcomes.append(healthy)
+        failures = self._outcomes.count(False)
+        if (self.state == "closed" and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_ratio):
+            self._open()
+
+    def release(self):
+        """The call was abandoned (e.g. it lost a hedge race) before it showed anything either way."""
+        self._probe_in_flight = False
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self._outcomes.clear()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(
+            name,
+            window=settings.ai_breaker_window,
+            failure_ratio=settings.ai_breaker_failure_ratio,
+            slow_seconds=settings.ai_breaker_slow_seconds,
+            cooldown=settings.ai_breaker_cooldown,
+        )
+    return breaker
+
+def breaker_states() -> Dict[str, str]:
+    return {name: breaker.state for name, breaker in _breakers.items()}
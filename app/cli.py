@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import sys
+from typing import List, Optional
+
+from .collector import create_collector
+from .config import settings
+from .http_client import close_client
+from .pipeline import analyze_batch
+from .rescore import rescore_profiles
+from .store import get_report_store
+
+async def _run_batch(args: argparse.Namespace) -> int:
+    collector = create_collector(token=args.token, max_wait=settings.batch_rate_limit_max_wait)
+
+    async def usernames():
+        for username in args.usernames:
+            yield username
+        if args.file:
+            with open(args.file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield line.strip()
+        if args.org:
+            async for username in collector.iter_org_members(args.org):
+                yield username
+
+    failures = 0
+    try:
+        async for result in analyze_batch(usernames(), collector, workers=args.workers):
+            failures += "error" in result
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+    finally:
+        await close_client()
+    return 1 if failures else 0
+
+def _run_rescore(args: argparse.Namespace) -> int:
+    last = [0.0]
+
+    def progress(stats):
+        # At most one progress line every two seconds
+        if stats["seconds"] - last[0] >= 2:
+            last[0] = stats["seconds"]
+            sys.stderr.write(f"{stats['profiles']:,} profiles re-scored ({stats['per_second']:,.0f}/s)\n")
+
+    stats = rescore_profiles(get_report_store(), workers=args.workers, chunk_size=args.chunk_size, progress=progress)
+    sys.stdout.write(json.dumps(stats) + "\n")
+    return 1 if stats["failed"] else 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="SignalMatrix Repo command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Analyze many GitHub users and print NDJSON reports")
+    batch.add_argument("usernames", nargs="*", help="GitHub usernames to analyze")
+    batch.add_argument("--org", help="Also analyze every public member of this GitHub organization")
+    batch.add_argument("--file", help="Read additional usernames from a file, one per line")
+    batch.add_argument("--workers", type=int, default=None, help="Concurrent analyses (default: BATCH_WORKERS)")
+    batch.add_argument("--token", default=None, help="GitHub token to use instead of GITHUB_TOKEN")
+
+    rescore = commands.add_parser("rescore", help="Re-score every stored profile with the current scoring rules",
+                                  description="Re-score every stored profile with the current scoring rules. "
+                                              "Running servers rank against the new cohort from their next "
+                                              "analysis; no restart is needed.")
+    rescore.add_argument("--workers", type=int, default=None, help="Scoring processes (default: RESCORE_WORKERS)")
+    rescore.add_argument("--chunk-size", type=int, default=None,
+                         help="Profiles per chunk and per write transaction (default: RESCORE_CHUNK_SIZE)")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        if not (args.usernames or args.org or args.file):
+            parser.error("batch needs usernames, --file or --org")
+        return asyncio.run(_run_batch(args))
+    if args.command == "rescore":
+        return _run_rescore(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
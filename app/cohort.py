@@ -0,0 +1,132 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Metrics ranked against the cohort, with their largest possible value
+METRIC_RANGES = {
+    "total": 50, "consistency": 10, "depth": 10, "clarity": 10, "focus": 10, "production": 10,
+}
+# Segment holding every profile regardless of language
+ALL_LANGUAGES = "*"
+
+class _Fenwick:
+    """Counts of integer values 0..size, with O(log n) "how many are <= v" queries."""
+    __slots__ = ("size", "total", "_tree")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.total = 0
+        self._tree = [0] * (size + 2)
+
+    @classmethod
+    def from_counts(cls, counts: List[int]) -> "_Fenwick":
+        """Build in O(size) from per-value counts, instead of one add() per profile."""
+        tree = cls(len(counts) - 1)
+        tree.total = sum(counts)
+        tree._tree[1:len(counts) + 1] = counts
+        for i in range(1, len(tree._tree)):
+            parent = i + (i & -i)
+            if parent < len(tree._tree):
+                tree._tree[parent] += tree._tree[i]
+        return tree
+
+    def add(self, value: int, delta: int):
+        self.total += delta
+        i = min(max(value, 0), self.size) + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def count_at_most(self, value: int) -> int:
+        if value < 0:
+            return 0
+        i = min(value, self.size) + 1
+        count = 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+def score_vector(total: int, breakdown: Dict[str, int]) -> Dict[str, int]:
+    """The per-profile values CohortIndex ranks: the total plus each breakdown metric."""
+    return {"total": total, **{m: breakdown[m] for m in METRIC_RANGES if m in breakdown}}
+
+def ordinal(n: int) -> str:
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+class CohortIndex:
+    """
+    Percentile ranks of every stored profile, segmented by primary language.
+    Scores are small integers, so each (language, metric) pair is a Fenwick
+    tree over the score range: adding or replacing a profile and ranking a
+    score are O(log range), and memory grows with the number of languages,
+    not the number of profiles.
+    """
+    def __init__(self, min_size: int):
+        self.min_size = min_size
+        self._trees: Dict[Tuple[str, str], _Fenwick] = {}
+
+    def add(self, language: Optional[str], scores: Dict[str, int], delta: int = 1):
+        for segment in _segments(language):
+            for metric, value in scores.items():
+                if metric not in METRIC_RANGES:
+                    continue
+                tree = self._trees.get((segment, metric))
+                if tree is None:
+                    tree = self._trees[(segment, metric)] = _Fenwick(METRIC_RANGES[metric])
+                tree.add(int(value), delta)
+
+    def remove(self, language: Optional[str], scores: Dict[str, int]):
+        self.add(language, scores, delta=-1)
+
+    def size(self, language: Optional[str] = ALL_LANGUAGES) -> int:
+        tree = self._trees.get((language or ALL_LANGUAGES, "total"))
+        return tree.total if tree else 0
+
+    def segment_for(self, language: Optional[str]) -> Optional[str]:
+        """The language's own segment when it is big enough to rank against, else everyone."""
+        # An empty segment has nothing to rank against, even with min_size 0
+        if language and self.size(language) >= max(self.min_size, 1):
+            return language
+        if self.size(ALL_LANGUAGES) >= max(self.min_size, 1):
+            return ALL_LANGUAGES
+        return None
+
+    def percentile(self, segment: str, metric: str, value: int) -> Optional[int]:
+        """Share of the segment scoring below value, counting ties as half (0-100)."""
+        tree = self._trees.get((segment, metric))
+        if tree is None or not tree.total:
+            return None
+        below = tree.count_at_most(int(value) - 1)
+        ties = tree.count_at_most(int(value)) - below
+        return round(100 * (below + ties / 2) / tree.total)
+
+    def rank(self, language: Optional[str], scores: Dict[str, int]) -> Optional[Dict]:
+        """Percentiles of a profile's scores within its cohort, or None while the cohort is too small."""
+        segment = self.segment_for(language)
+        if segment is None:
+            return None
+        return {
+            "language": None if segment == ALL_LANGUAGES else segment,
+            "size": self.size(segment),
+            "percentiles": {metric: self.percentile(segment, metric, value) for metric, value in scores.items()
+                            if metric in METRIC_RANGES},
+        }
+
+    @classmethod
+    def build(cls, counts: Iterable[Tuple[Optional[str], str, int, int]], min_size: int) -> "CohortIndex":
+        """Build from (language, metric, value, profiles) counts, e.g. a GROUP BY over stored scores."""
+        columns: Dict[Tuple[str, str], List[int]] = {}
+        for language, metric, value, profiles in counts:
+            if metric not in METRIC_RANGES:
+                continue
+            for segment in _segments(language):
+                column = columns.get((segment, metric))
+                if column is None:
+                    column = columns[(segment, metric)] = [0] * (METRIC_RANGES[metric] + 1)
+                column[min(max(int(value), 0), METRIC_RANGES[metric])] += profiles
+        index = cls(min_size)
+        index._trees = {key: _Fenwick.from_counts(column) for key, column in columns.items()}
+        return index
+
+def _segments(language: Optional[str]) -> Tuple[str, ...]:
+    return (ALL_LANGUAGES, language) if language else (ALL_LANGUAGES,)
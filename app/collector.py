@@ -1,58 +1,344 @@
-import requests
-from typing import Dict, List, Optional, Any
+import asyncio
+import heapq
+import json
+import math
+import re
+import time
+from datetime import datetime
+import httpx
+from typing import Dict, List, Optional, Any, AsyncIterator, Tuple
 from .config import settings
+from .http_client import get_client, host_limit
+from .cache import ResponseCache, RepoSnapshotCache, get_response_cache, get_snapshot_cache, endpoint_type
+from .commit_stats import CommitAggregate
+from .features import RepoFeatures
+from .metrics import observe_upstream
+from .models import Commit, Issue, PullRequest, RawProfile, Release, Repo, RepoDetails, User, project_payload
+from .path_index import TreeParser
+from .rate_limit import RateLimitScheduler, RateLimitExceeded, get_scheduler
+
+# REST calls made by get_repo_details for every detailed repository, plus one per page of commits
+CALLS_PER_DETAILED_REPO = 5
+
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+def _age_in_years(timestamp: Optional[str], now: float) -> float:
+    if not timestamp:
+        return 100.0
+    then = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    return max(0.0, (now - then) / (365 * 24 * 3600))
+
+def rank_repos(repos: List[Repo], k: int, strategy: str) -> List[Repo]:
+    """
+    Pick the k repositories worth a detailed look. 'updated' keeps GitHub's
+    most-recently-updated order; 'stars', 'recent' and 'stars_recent' prefer
+    original work over forks, then rank by popularity and/or recency.
+    """
+    if strategy == "updated":
+        return repos[:k]
+
+    now = time.time()
+    def key(repo: Repo) -> Tuple:
+        original = not repo.fork
+        stars = repo.stargazers_count or 0
+        age = _age_in_years(repo.pushed_at or repo.updated_at, now)
+        if strategy == "stars":
+            return (original, stars, -age)
+        if strategy == "recent":
+            return (original, -age)
+        # Stars decay with time since the last push, so abandoned hits don't crowd out current work
+        return (original, math.log1p(stars) - age, -age)
+
+    return heapq.nlargest(k, repos, key=key)
 
 class GitHubCollector:
-    def __init__(self, token: str = None):
-        self.token = token or settings.github_token
-        self.base_url = "https://api.github.com"
+    # Rate-limit resource that detail fetches draw on
+    detail_resource = "core"
+
+    def __init__(self, token: str = None, client: Optional[httpx.AsyncClient] = None,
+                 cache: Optional[ResponseCache] = None, scheduler: Optional[RateLimitScheduler] = None,
+                 max_wait: Optional[float] = None, snapshots: Optional[RepoSnapshotCache] = None):
+        # A client-supplied token adds capacity to the shared pool for this collector's calls only
+        self.token = token
+        self.base_url = settings.github_api_url.rstrip("/")
+        self.client = client or get_client()
+        self.cache = cache or get_response_cache()
+        self.scheduler = scheduler or get_scheduler()
+        self.snapshots = snapshots or get_snapshot_cache()
+        self.max_wait = max_wait
         self.headers = {
-            "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json"
         }
 
-    def _get(self, endpoint: str, params: Optional[Dict] = None) -> Any:
+    async def _send(self, method: str, url: str, resource: str = "core",
+                    headers: Optional[Dict] = None, stream: bool = False, **kwargs) -> httpx.Response:
+        """
+        Send one GitHub request through the rate-limit scheduler, retrying when throttled.
+        With stream=True the body is left unread and the caller must close the response.
+        """
+        for _ in range(settings.github_rate_limit_retries + 1):
+            state = await self.scheduler.acquire(resource, extra_token=self.token, max_wait=self.max_wait)
+            request_headers = {**self.headers, **(headers or {})}
+            if state.token:
+                request_headers["Authorization"] = f"token {state.token}"
+            kind = endpoint_type(url[len(self.base_url):])
+            started = time.perf_counter()
+            try:
+                async with host_limit(url):
+                    if stream:
+                        request = self.client.build_request(method, url, headers=request_headers, **kwargs)
+                        response = await self.client.send(request, stream=True)
+                        if response.status_code in (403, 429):
+                            # Rate-limit replies are small and observe() may need their text
+                            await response.aread()
+                    else:
+                        response = await self.client.request(method, url, headers=request_headers, **kwargs)
+            except httpx.RequestError as e:
+                observe_upstream("github", kind, 0, time.perf_counter() - started)
+                # Mask token in error message if present in headers but logged elsewhere
+                raise Exception(f"GitHub API Error: {str(e)}")
+            observe_upstream("github", kind, response.status_code, time.perf_counter() - started)
+
+            if not self.scheduler.observe(state, response):
+                return response
+            if stream:
+                await response.aclose()
+        raise RateLimitExceeded("GitHub API rate limit exceeded. Please try again later or use a token with higher limits.")
+
+    async def _get(self, endpoint: str, params: Optional[Dict] = None) -> Any:
+        body, _ = await self._get_page(endpoint, params)
+        return body
+
+    async def _get_page(self, endpoint: str, params: Optional[Dict] = None) -> Tuple[Any, Optional[str]]:
+        """GET one resource, returning its compact JSON body (see models.project_payload) and raw Link header."""
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        cached = self.cache.get(endpoint, params) if self.cache else None
+        if cached and cached.fresh:
+            return cached.body, cached.link
+
+        headers = {}
+        if cached:
+            # Conditional requests answered with 304 don't count against the rate limit
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        response = await self._send("GET", url, headers=headers, params=params)
+        if response.status_code == 304 and cached:
+            self.cache.mark_revalidated(endpoint, params)
+            return cached.body, cached.link
+
+        response.raise_for_status()
+        link = response.headers.get("Link")
+        # Project before caching, so cached bodies hold only the fields we read
+        body = project_payload(endpoint_type(endpoint), response.json())
+        if self.cache:
+            self.cache.put(endpoint, params, json.dumps(body, separators=(",", ":")).encode(),
+                           response.headers.get("ETag"), response.headers.get("Last-Modified"), link)
+        return body, link
+
+    def _next_page(self, link: Optional[str]) -> Optional[Tuple[str, Dict]]:
+        match = _NEXT_LINK.search(link or "")
+        if not match:
+            return None
+        url = httpx.URL(match.group(1))
+        base_path = httpx.URL(self.base_url).path.rstrip("/")
+        endpoint = url.path[len(base_path):] if url.path.startswith(base_path) else url.path
+        return endpoint.lstrip("/"), dict(url.params)
+
+    async def _paginate(self, endpoint: str, params: Optional[Dict] = None,
+                        max_items: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Yield items from a list endpoint page by page, following rel="next" links."""
+        page: Optional[Tuple[str, Dict]] = (endpoint, {**(params or {}), "per_page": 100})
+        yielded = 0
+        while page:
+            items, link = await self._get_page(*page)
+            for item in items:
+                if max_items is not None and yielded >= max_items:
+                    return
+                yield item
+                yielded += 1
+            page = self._next_page(link)
+
+    async def get_user(self, username: str) -> User:
+        return User.from_dict(await self._get(f"users/{username}"))
+
+    async def iter_repos(self, username: str) -> AsyncIterator[Repo]:
+        """Stream every public repository of a user as a compact summary."""
+        async for repo in self._paginate(f"users/{username}/repos", params={"sort": "updated"},
+                                         max_items=settings.repo_max_count):
+            yield Repo.from_dict(repo)
+
+    async def get_repos(self, username: str) -> List[Repo]:
+        return [repo async for repo in self.iter_repos(username)]
+
+    async def get_languages(self, owner: str, repo: str) -> Dict:
+        return await self._get(f"repos/{owner}/{repo}/languages")
+
+    async def get_tree(self, owner: str, repo: str, ref: str = "HEAD") -> Dict[str, Any]:
+        """
+        Summarise the repository's full file tree (see PathIndex) from one
+        recursive `git/trees` call. Large trees run to tens of MB, so the body
+        is parsed as it streams in and only the summary is kept and cached.
+        """
+        endpoint = f"repos/{owner}/{repo}/git/trees/{ref}"
+        params = {"recursive": "1"}
+        cached = self.cache.get(endpoint, params) if self.cache else None
+        if cached and cached.fresh:
+            return cached.body
+
+        headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+        parser = TreeParser(settings.tree_max_entries)
+        response = await self._send("GET", f"{self.base_url}/{endpoint}", headers=headers, params=params, stream=True)
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=20)
-            
-            if response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
-                raise Exception("GitHub API rate limit exceeded. Please try again later or use a token with higher limits.")
-            
+            if response.status_code == 304 and cached:
+                self.cache.mark_revalidated(endpoint, params)
+                return cached.body
+            # Empty repositories have no tree (409); an unknown ref is a 404
+            if response.status_code in (404, 409):
+                return parser.close().as_dict()
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            # Mask token in error message if present in headers but logged elsewhere
-            raise Exception(f"GitHub API Error: {str(e)}")
+            async for chunk in response.aiter_text():
+                if not parser.feed(chunk):
+                    break
+        finally:
+            await response.aclose()
 
-    def get_user(self, username: str) -> Dict:
-        return self._get(f"users/{username}")
+        summary = parser.close().as_dict()
+        if self.cache:
+            self.cache.put(endpoint, params, json.dumps(summary, separators=(",", ":")).encode(),
+                           response.headers.get("ETag"))
+        return summary
+
+    async def iter_commits(self, owner: str, repo: str) -> AsyncIterator[Commit]:
+        """Stream a repository's history newest first, one page at a time, up to COMMIT_HISTORY_MAX."""
+        try:
+            async for commit in self._paginate(f"repos/{owner}/{repo}/commits",
+                                               max_items=settings.commit_history_max):
+                yield Commit.from_dict(commit)
+        except httpx.HTTPStatusError as e:
+            # Empty repositories answer 409 Conflict instead of an empty list
+            if e.response.status_code != 409:
+                raise
 
-    def get_repos(self, username: str) -> List[Dict]:
-        return self._get(f"users/{username}/repos", params={"sort": "updated", "per_page": 100})
+    async def get_commit_stats(self, owner: str, repo: str) -> Dict[str, Any]:
+        """Fold the commit history into a CommitAggregate without holding more than one page."""
+        aggregate = CommitAggregate()
+        async for commit in self.iter_commits(owner, repo):
+            aggregate.add(commit)
+        return aggregate.as_dict()
 
-    def get_languages(self, owner: str, repo: str) -> Dict:
-        return self._get(f"repos/{owner}/{repo}/languages")
+    async def get_pulls(self, owner: str, repo: str) -> List[PullRequest]:
+        pulls = await self._get(f"repos/{owner}/{repo}/pulls", params={"state": "all", "per_page": 30})
+        return [PullRequest.from_dict(pull) for pull in pulls]
 
-    def get_contents(self, owner: str, repo: str, path: str = "") -> List[Dict]:
+    async def get_issues(self, owner: str, repo: str) -> List[Issue]:
+        issues = await self._get(f"repos/{owner}/{repo}/issues", params={"state": "all", "per_page": 30})
+        return [Issue.from_dict(issue) for issue in issues]
+
+    async def get_releases(self, owner: str, repo: str) -> List[Release]:
+        releases = await self._get(f"repos/{owner}/{repo}/releases")
+        return [Release.from_dict(release) for release in releases]
+
+    async def iter_org_members(self, org: str) -> AsyncIterator[str]:
+        async for member in self._paginate(f"orgs/{org}/members"):
+            yield member["login"]
+
+    async def get_repo_details(self, owner: str, repo: str, ref: Optional[str] = None) -> RepoDetails:
+        # All per-repo endpoints are independent, so fetch them concurrently
+        languages, tree, commit_stats, pulls, issues, releases = await asyncio.gather(
+            self.get_languages(owner, repo),
+            self.get_tree(owner, repo, ref or "HEAD"),
+            self.get_commit_stats(owner, repo),
+            self.get_pulls(owner, repo),
+            self.get_issues(owner, repo),
+            self.get_releases(owner, repo),
+        )
+        return RepoDetails(languages=languages, tree=tree, commit_stats=commit_stats,
+                           pulls=pulls, issues=issues, releases=releases)
+
+    def detail_cost(self) -> int:
+        """Budget one detailed repo uses, in the worst case of a full COMMIT_HISTORY_MAX of history."""
+        return CALLS_PER_DETAILED_REPO + math.ceil(settings.commit_history_max / 100)
+
+    def detail_budget(self, limit: int) -> int:
+        """Shrink the number of detailed repos when the rate-limit budget is running low."""
+        remaining = self.scheduler.available(self.detail_resource, extra_token=self.token)
+        if remaining is None:
+            return limit
+        return max(1, min(limit, remaining // (2 * self.detail_cost())))
+
+    async def get_head_sha(self, owner: str, repo: str) -> Optional[str]:
+        """SHA of the newest commit on the default branch; a conditional request once it's cached."""
         try:
-            return self._get(f"repos/{owner}/{repo}/contents/{path}")
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                return []
-            raise
+            commits = await self._get(f"repos/{owner}/{repo}/commits", params={"per_page": 1})
+        except httpx.HTTPStatusError as e:
+            # Empty repositories answer 409 Conflict instead of an empty list
+            if e.response.status_code != 409:
+                raise
+            return None
+        return Commit.from_dict(commits[0]).sha if commits else None
+
+    async def reuse_snapshots(self, owner: str, repos: List[Repo],
+                              heads: Optional[Dict[str, Optional[str]]] = None) -> Tuple[Dict[str, Dict], List[Repo]]:
+        """
+        Split ranked repos into feature rows still valid from an earlier fetch
+        and repos to refetch. A snapshot is reused only while its listing
+        timestamps and head commit both match; heads maps repo names to head
+        SHAs when the caller already knows them, otherwise they're fetched.
+        """
+        if self.snapshots is None:
+            return {}, repos
+        snapshots = self.snapshots.get_many(owner, [repo.name for repo in repos])
+        # Only repos whose listing still matches are worth a head lookup
+        candidates = [repo for repo in repos
+                      if repo.name in snapshots and self.snapshots.is_current(snapshots[repo.name], repo)]
+        if heads is None:
+            shas = await asyncio.gather(*(self.get_head_sha(owner, repo.name) for repo in candidates))
+            heads = {repo.name: sha for repo, sha in zip(candidates, shas)}
+        reused = {repo.name: snapshots[repo.name].features for repo in candidates
+                  if self.snapshots.is_current(snapshots[repo.name], repo, heads.get(repo.name))}
+        stale = [repo for repo in repos if repo.name not in reused]
+        self.snapshots.stats["reused"] += len(reused)
+        self.snapshots.stats["refreshed"] += len(stale)
+        return reused, stale
 
-    def get_commits(self, owner: str, repo: str) -> List[Dict]:
-        return self._get(f"repos/{owner}/{repo}/commits", params={"per_page": 30})
+    def remember_snapshots(self, owner: str, repos: List[Repo], repo_details: Dict[str, RepoDetails]):
+        if self.snapshots is None:
+            return
+        entries = []
+        for repo in repos:
+            details = repo_details.get(repo.name)
+            if details is None:
+                continue
+            row = RepoFeatures.extract(details)
+            entries.append((repo.name, repo.pushed_at, repo.updated_at, row["commit_stats"]["head_sha"], row))
+        self.snapshots.put_many(owner, entries)
 
-    def get_pulls(self, owner: str, repo: str) -> List[Dict]:
-        return self._get(f"repos/{owner}/{repo}/pulls", params={"state": "all", "per_page": 30})
+    async def collect_profile(self, username: str, max_repos: Optional[int] = None) -> RawProfile:
+        """
+        Layer 1: gather everything the ScoringEngine needs for one user.
+        Top-ranked repos unchanged since their last snapshot come back as
+        extracted rows in repo_features; only the rest are fetched in detail.
+        """
+        user_data, repos = await asyncio.gather(self.get_user(username), self.get_repos(username))
 
-    def get_issues(self, owner: str, repo: str) -> List[Dict]:
-        return self._get(f"repos/{owner}/{repo}/issues", params={"state": "all", "per_page": 30})
+        # Details only for the top-ranked repos; the rest keep their cheap listing metadata
+        limit = self.detail_budget(max_repos or settings.repo_detail_limit)
+        top = rank_repos(repos, limit, settings.repo_rank_strategy)
+        reused, stale = await self.reuse_snapshots(username, top)
+        details = await asyncio.gather(*(
+            self.get_repo_details(username, repo.name, repo.default_branch) for repo in stale
+        ))
+        repo_details = {repo.name: d for repo, d in zip(stale, details)}
+        self.remember_snapshots(username, stale, repo_details)
 
-    def get_releases(self, owner: str, repo: str) -> List[Dict]:
-        return self._get(f"repos/{owner}/{repo}/releases")
+        return RawProfile(user_data, repos, repo_details, reused)
 
-    def get_workflow_files(self, owner: str, repo: str) -> List[Dict]:
-        return self.get_contents(owner, repo, ".github/workflows")
+def create_collector(token: str = None, max_wait: Optional[float] = None) -> GitHubCollector:
+    """Build the collector backend selected by COLLECTOR_BACKEND."""
+    if settings.collector_backend.lower() == "graphql":
+        from .graphql_collector import GraphQLCollector
+        return GraphQLCollector(token=token, max_wait=max_wait)
+    return GitHubCollector(token=token, max_wait=max_wait)
@@ -0,0 +1,158 @@
+import base64
+import hashlib
+import math
+from datetime import datetime
+from typing import Any, Dict, Optional
+from .models import Commit
+
+# HyperLogLog precision: 2^12 one-byte registers, ~1.6% standard error
+HLL_PRECISION = 12
+# Distinct messages counted exactly (as 64-bit hashes) before switching to HyperLogLog
+EXACT_LIMIT = 512
+
+_REGISTERS = 1 << HLL_PRECISION
+_HASH_BITS = 64
+
+def _hash(message: str) -> int:
+    return int.from_bytes(hashlib.blake2b(message.encode("utf-8"), digest_size=8).digest(), "big")
+
+class MessageSketch:
+    """
+    Distinct count of commit messages in bounded memory. Small histories
+    keep the exact set of message hashes; past EXACT_LIMIT the set is folded
+    into HyperLogLog registers. Sketches merge, so per-repo sketches combine
+    into a profile-wide one.
+    """
+    __slots__ = ("_exact", "_registers")
+
+    def __init__(self):
+        self._exact: Optional[set] = set()
+        self._registers: Optional[bytearray] = None
+
+    def add(self, message: str):
+        self._add_hash(_hash(message))
+
+    def _add_hash(self, h: int):
+        if self._exact is not None:
+            self._exact.add(h)
+            if len(self._exact) > EXACT_LIMIT:
+                self._to_registers()
+            return
+        index = h >> (_HASH_BITS - HLL_PRECISION)
+        rest = h & ((1 << (_HASH_BITS - HLL_PRECISION)) - 1)
+        rank = (_HASH_BITS - HLL_PRECISION) - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def _to_registers(self):
+        exact, self._exact = self._exact, None
+        self._registers = bytearray(_REGISTERS)
+        for h in exact:
+            self._add_hash(h)
+
+    def merge(self, other: "MessageSketch"):
+        if other._exact is not None:
+            for h in other._exact:
+                self._add_hash(h)
+            return
+        if self._exact is not None:
+            self._to_registers()
+        self._registers = bytearray(max(a, b) for a, b in zip(self._registers, other._registers))
+
+    def estimate(self) -> int:
+        if self._exact is not None:
+            return len(self._exact)
+        m = _REGISTERS
+        raw = (0.7213 / (1 + 1.079 / m)) * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def as_dict(self) -> Dict[str, Any]:
+        if self._exact is not None:
+            return {"exact": sorted(self._exact)}
+        return {"registers": base64.b64encode(bytes(self._registers)).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MessageSketch":
+        sketch = cls()
+        if "registers" in data:
+            sketch._exact = None
+            sketch._registers = bytearray(base64.b64decode(data["registers"]))
+        else:
+            sketch._exact = set(data.get("exact", []))
+        return sketch
+
+def _week(timestamp: str) -> int:
+    """Weeks since the Unix epoch, starting on Mondays."""
+    days = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp() // 86400
+    return int(days + 3) // 7
+
+class CommitAggregate:
+    """
+    Everything scoring needs from a commit history, folded one commit at a
+    time: the count, commits per week, the newest SHA and a sketch of
+    message diversity. Memory is bounded by the number of active weeks, not
+    the number of commits, so histories can be streamed page by page.
+    """
+    __slots__ = ("commits", "weeks", "head_sha", "messages")
+
+    def __init__(self):
+        self.commits = 0
+        self.weeks: Dict[int, int] = {}
+        self.head_sha: Optional[str] = None
+        self.messages = MessageSketch()
+
+    def add(self, commit: Commit):
+        """Fold one commit (newest first) into the aggregate."""
+        self.commits += 1
+        if self.head_sha is None:
+            self.head_sha = commit.sha
+        self.messages.add(commit.message or "")
+        if commit.date:
+            week = _week(commit.date)
+            self.weeks[week] = self.weeks.get(week, 0) + 1
+
+    def merge(self, other: "CommitAggregate"):
+        self.commits += other.commits
+        for week, count in other.weeks.items():
+            self.weeks[week] = self.weeks.get(week, 0) + count
+        self.messages.merge(other.messages)
+
+    @property
+    def dated(self) -> bool:
+        return bool(self.weeks)
+
+    @property
+    def active_weeks(self) -> int:
+        return len(self.weeks)
+
+    def longest_streak(self) -> int:
+        """Most consecutive weeks with at least one commit."""
+        longest = run = 0
+        previous = None
+        for week in sorted(self.weeks):
+            run = run + 1 if previous is not None and week == previous + 1 else 1
+            longest = max(longest, run)
+            previous = week
+        return longest
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "commits": self.commits,
+            # JSON object keys must be strings
+            "weeks": {str(week): count for week, count in self.weeks.items()},
+            "head_sha": self.head_sha,
+            "messages": self.messages.as_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CommitAggregate":
+        aggregate = cls()
+        aggregate.commits = data["commits"]
+        aggregate.weeks = {int(week): count for week, count in data["weeks"].items()}
+        aggregate.head_sha = data.get("head_sha")
+        aggregate.messages = MessageSketch.from_dict(data["messages"])
+        return aggregate
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, SecretStr
-from typing import Optional
+from typing import Optional, Dict
 import os
 
 class Settings(BaseSettings):
@@ -16,6 +16,8 @@ class Settings(BaseSettings):
 
     # API Keys
     github_token: str = Field(..., validation_alias="GITHUB_TOKEN")
+    # Extra tokens pooled with GITHUB_TOKEN for rate-limit capacity (comma separated)
+    github_tokens: str = Field("", validation_alias="GITHUB_TOKENS")
     openai_api_key: Optional[str] = Field(None, validation_alias="OPENAI_API_KEY")
     blackbox_api_key: Optional[str] = Field(None, validation_alias="BLACKBOX_API_KEY")
 
@@ -23,6 +25,100 @@ class Settings(BaseSettings):
     ai_provider: str = Field("openai", validation_alias="AI_PROVIDER") # 'openai' or 'blackbox'
     openai_model: str = Field("gpt-4o-mini", validation_alias="OPENAI_MODEL")
     blackbox_model: str = Field("blackboxai", validation_alias="BLACKBOX_MODEL")
+    # Other providers (comma separated) raced against AI_PROVIDER when it is slow, failing or tripped
+    ai_hedge_providers: str = Field("", validation_alias="AI_HEDGE_PROVIDERS")
+    # Seconds to wait on the first provider before also asking the next one
+    ai_hedge_delay: float = Field(3.0, validation_alias="AI_HEDGE_DELAY")
+    # Longest one analysis waits for AI sections before using the rule-based fallback (seconds)
+    ai_latency_budget: float = Field(20.0, validation_alias="AI_LATENCY_BUDGET")
+    # Per-provider circuit breaker: trip when this share of the last AI_BREAKER_WINDOW calls failed or
+    # took longer than AI_BREAKER_SLOW_SECONDS, then retry with one call after AI_BREAKER_COOLDOWN seconds
+    ai_breaker_window: int = Field(20, validation_alias="AI_BREAKER_WINDOW")
+    ai_breaker_failure_ratio: float = Field(0.5, validation_alias="AI_BREAKER_FAILURE_RATIO")
+    ai_breaker_slow_seconds: float = Field(10.0, validation_alias="AI_BREAKER_SLOW_SECONDS")
+    ai_breaker_cooldown: float = Field(30.0, validation_alias="AI_BREAKER_COOLDOWN")
+
+    # Upstream endpoints (overridable for benchmarks against a local stand-in)
+    github_api_url: str = Field("https://api.github.com", validation_alias="GITHUB_API_URL")
+    openai_api_url: str = Field("https://api.openai.com/v1/chat/completions", validation_alias="OPENAI_API_URL")
+    blackbox_api_url: str = Field("https://api.blackbox.ai/v1/chat/completions", validation_alias="BLACKBOX_API_URL")
+
+    # Data Collection
+    collector_backend: str = Field("rest", validation_alias="COLLECTOR_BACKEND") # 'rest' or 'graphql'
+    # Repositories that get a full detail fetch; the rest only contribute listing metadata
+    repo_detail_limit: int = Field(5, validation_alias="REPO_DETAIL_LIMIT")
+    # How detailed repos are chosen: 'stars_recent', 'stars', 'recent' or 'updated'
+    repo_rank_strategy: str = Field("stars_recent", validation_alias="REPO_RANK_STRATEGY")
+    # Upper bound on repositories listed per user
+    repo_max_count: int = Field(3000, validation_alias="REPO_MAX_COUNT")
+    # Tree entries indexed per repo before the rest of a huge recursive tree is skipped
+    tree_max_entries: int = Field(100000, validation_alias="TREE_MAX_ENTRIES")
+    # Commits streamed per detailed repo (100 per call) for activity and message-diversity signals
+    commit_history_max: int = Field(1000, validation_alias="COMMIT_HISTORY_MAX")
+
+    # Finished-report cache in front of /api/analyze (seconds, 0 disables)
+    report_cache_ttl: int = Field(0, validation_alias="REPORT_CACHE_TTL")
+    report_cache_max_entries: int = Field(1024, validation_alias="REPORT_CACHE_MAX_ENTRIES")
+
+    # Report Store and Background Jobs
+    report_store_path: str = Field("signalmatrix_reports.db", validation_alias="REPORT_STORE_PATH")
+    job_workers: int = Field(4, validation_alias="JOB_WORKERS")
+    # Queued background analyses beyond this are rejected with 503
+    job_queue_max: int = Field(1000, validation_alias="JOB_QUEUE_MAX")
+    # Stored profiles needed before decisions and benchmark positions become cohort percentiles
+    cohort_min_size: int = Field(200, validation_alias="COHORT_MIN_SIZE")
+
+    # Batch Analysis
+    batch_workers: int = Field(4, validation_alias="BATCH_WORKERS")
+    # Batch jobs queue for rate-limit budget up to a full GitHub window instead of failing
+    batch_rate_limit_max_wait: float = Field(3600, validation_alias="BATCH_RATE_LIMIT_MAX_WAIT")
+
+    # Re-scoring stored profiles (`python -m app.cli rescore`)
+    # Scoring processes; 0 uses every CPU
+    rescore_workers: int = Field(0, validation_alias="RESCORE_WORKERS")
+    # Profiles per chunk handed to a worker and written back in one transaction
+    rescore_chunk_size: int = Field(500, validation_alias="RESCORE_CHUNK_SIZE")
+
+    # HTTP Client
+    http2_enabled: bool = Field(True, validation_alias="HTTP2_ENABLED")
+    http_max_connections: int = Field(100, validation_alias="HTTP_MAX_CONNECTIONS")
+    http_per_host_concurrency: int = Field(16, validation_alias="HTTP_PER_HOST_CONCURRENCY")
+
+    # AI Result Cache (same SQLite file as the response cache)
+    llm_cache_enabled: bool = Field(True, validation_alias="LLM_CACHE_ENABLED")
+    # Seconds a generated report section set is reused for identical signals
+    llm_cache_ttl: int = Field(7 * 86400, validation_alias="LLM_CACHE_TTL")
+    llm_cache_max_mb: int = Field(64, validation_alias="LLM_CACHE_MAX_MB")
+
+    # Incremental Re-analysis
+    # Reuse a repo's extracted features while its pushed_at/updated_at are unchanged
+    repo_snapshots_enabled: bool = Field(True, validation_alias="REPO_SNAPSHOTS_ENABLED")
+    # Refetch anyway after this many seconds, so issue/PR activity without pushes is picked up
+    repo_snapshot_max_age: int = Field(7 * 86400, validation_alias="REPO_SNAPSHOT_MAX_AGE")
+
+    # Observability
+    server_timing_enabled: bool = Field(False, validation_alias="SERVER_TIMING_ENABLED") # per-layer Server-Timing response header
+
+    # GitHub Rate Limiting
+    # Start spacing calls evenly over the rest of the window below this many remaining calls
+    github_pace_below: int = Field(500, validation_alias="GITHUB_PACE_BELOW")
+    # Longest an interactive request queues for rate-limit budget before giving up (seconds)
+    github_rate_limit_max_wait: float = Field(120, validation_alias="GITHUB_RATE_LIMIT_MAX_WAIT")
+    github_rate_limit_retries: int = Field(3, validation_alias="GITHUB_RATE_LIMIT_RETRIES")
+
+    # Response Cache
+    cache_path: str = Field("signalmatrix_cache.db", validation_alias="CACHE_PATH")
+    github_cache_enabled: bool = Field(True, validation_alias="GITHUB_CACHE_ENABLED")
+    github_cache_max_mb: int = Field(256, validation_alias="GITHUB_CACHE_MAX_MB")
+    # Seconds before a cached response must be revalidated, per endpoint type (JSON object)
+    github_cache_ttls: Dict[str, int] = Field(
+        default_factory=lambda: {
+            "user": 3600, "repos": 900, "languages": 86400, "contents": 3600, "trees": 3600,
+            "commits": 600, "pulls": 600, "issues": 600, "releases": 3600, "graphql": 600,
+            "default": 300,
+        },
+        validation_alias="GITHUB_CACHE_TTLS"
+    )
 
 # Singleton instance for globally accessible settings
 settings = Settings()
@@ -0,0 +1,135 @@
+from array import array
+from typing import Dict, List, Any, Optional, Union
+from .commit_stats import CommitAggregate
+from .models import ContentEntry, RepoDetails
+
+STRUCTURE_DIRS = frozenset(['src', 'app', 'lib', 'include'])
+# Per-repo array columns, in the order rows are laid out
+ROW_COLUMNS = (
+    "has_readme", "structured", "depth", "language_count", "file_count", "has_dockerfile",
+    "has_ci", "has_tests", "has_releases", "commit_count", "has_pulls", "has_issues",
+)
+# Bumped whenever extract() changes, so stored rows from older code are refetched
+FEATURE_VERSION = 4
+
+class RepoFeatures:
+    """
+    Layer 2: Signal Extraction.
+    Column-oriented table of per-repo signals built in a single pass over
+    repo_details; ScoringEngine computes every metric from these columns
+    instead of re-walking the raw GitHub payloads.
+    """
+    __slots__ = (
+        "names", "has_readme", "structured", "depth", "language_count", "file_count",
+        "has_dockerfile", "has_ci", "has_tests", "has_releases", "commit_count",
+        "has_pulls", "has_issues", "language_bytes", "activity",
+    )
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.has_readme = array('B')
+        self.structured = array('B')
+        self.depth = array('B')
+        self.language_count = array('I')
+        self.file_count = array('I')
+        self.has_dockerfile = array('B')
+        self.has_ci = array('B')
+        self.has_tests = array('B')
+        self.has_releases = array('B')
+        self.commit_count = array('I')
+        self.has_pulls = array('B')
+        self.has_issues = array('B')
+        # Profile-wide aggregates
+        self.language_bytes: Dict[str, int] = {}
+        self.activity = CommitAggregate()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_details(cls, repo_details: Dict[str, Union[RepoDetails, Dict[str, Any]]],
+                     rows: Optional[Dict[str, Dict[str, Any]]] = None) -> "RepoFeatures":
+        """Build from raw repo payloads, plus already-extracted rows (e.g. from repo snapshots)."""
+        table = cls()
+        for name, details in repo_details.items():
+            table.add(name, details)
+        for name, row in (rows or {}).items():
+            table.add_row(name, row)
+        return table
+
+    @staticmethod
+    def extract(details: Union[RepoDetails, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        One repo's signals as a plain, JSON-serialisable row. Layout signals
+        come from the recursive tree index when present (REST backend), else
+        from the root `contents` listing (GraphQL backend, older fixtures).
+        """
+        if isinstance(details, dict):
+            details = RepoDetails.from_dict(details)
+        row = RepoFeatures._tree_signals(details.tree) if details.tree is not None else \
+            RepoFeatures._contents_signals(details.contents)
+
+        languages = details.languages
+        # The REST collector streams history into commit_stats; other sources hand over a commit list
+        commit_stats = details.commit_stats
+        if commit_stats is None:
+            aggregate = CommitAggregate()
+            for commit in details.commits:
+                aggregate.add(commit)
+            commit_stats = aggregate.as_dict()
+
+        return {
+            **row,
+            "version": FEATURE_VERSION,
+            "language_count": len(languages),
+            "has_releases": bool(details.releases),
+            "commit_count": commit_stats["commits"],
+            "has_pulls": bool(details.pulls),
+            "has_issues": bool(details.issues),
+            "languages": languages,
+            "commit_stats": commit_stats,
+        }
+
+    @staticmethod
+    def _tree_signals(tree: Dict[str, Any]) -> Dict[str, Any]:
+        root = [name.lower() for name in tree["root"]]
+        return {
+            "has_readme": any(name.startswith("readme") for name in root),
+            "structured": not STRUCTURE_DIRS.isdisjoint(name.lower() for name in tree["root_dirs"]),
+            "depth": tree["depth_p90"],
+            # Root entries, like the contents listing; the complexity thresholds are set for that count
+            "file_count": len(tree["root"]),
+            "has_dockerfile": tree["has_dockerfile"],
+            "has_ci": tree["has_ci"],
+            "has_tests": tree["has_tests"],
+        }
+
+    @staticmethod
+    def _contents_signals(contents: List[ContentEntry]) -> Dict[str, Any]:
+        # Only the root is visible here, so depth is 1 if there is any directory at all
+        entry_names = set()
+        has_dir = False
+        for entry in contents:
+            entry_names.add((entry.name or "").lower())
+            has_dir = has_dir or entry.type == "dir"
+        return {
+            "has_readme": 'readme.md' in entry_names,
+            "structured": not STRUCTURE_DIRS.isdisjoint(entry_names),
+            "depth": int(has_dir),
+            "file_count": len(contents),
+            "has_dockerfile": 'dockerfile' in entry_names,
+            "has_ci": '.github' in entry_names,
+            "has_tests": any('test' in n for n in entry_names),
+        }
+
+    def add(self, name: str, details: Union[RepoDetails, Dict[str, Any]]):
+        self.add_row(name, self.extract(details))
+
+    def add_row(self, name: str, row: Dict[str, Any]):
+        for language, size in row["languages"].items():
+            self.language_bytes[language] = self.language_bytes.get(language, 0) + size
+        self.activity.merge(CommitAggregate.from_dict(row["commit_stats"]))
+
+        self.names.append(name)
+        for column in ROW_COLUMNS:
+            getattr(self, column).append(row[column])
@@ -0,0 +1,207 @@
+import json
+import httpx
+from typing import Dict, List, Any, Optional
+from .collector import GitHubCollector, rank_repos
+from .config import settings
+from .models import Commit, ContentEntry, Issue, PullRequest, RawProfile, Release, Repo, RepoDetails, User
+
+# The user and one page of their repositories. Pages are followed with
+# `cursor` until every repo is listed.
+PROFILE_QUERY = """
+query Profile($login: String!, $cursor: String) {
+  user(login: $login) {
+    login
+    name
+    bio
+    company
+    location
+    blog: websiteUrl
+    createdAt
+    followers { totalCount }
+    following { totalCount }
+    repositories(first: 100, after: $cursor, ownerAffiliations: OWNER, privacy: PUBLIC,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        isFork
+        isArchived
+        createdAt
+        updatedAt
+        pushedAt
+        stargazerCount
+        forkCount
+        primaryLanguage { name }
+        defaultBranchRef { target { oid } }
+      }
+    }
+  }
+}
+"""
+
+REPO_DETAILS_FRAGMENT = """
+fragment RepoDetails on Repository {
+  name
+  languages(first: 20, orderBy: {field: SIZE, direction: DESC}) {
+    edges { size node { name } }
+  }
+  object(expression: "HEAD:") {
+    ... on Tree { entries { name type } }
+  }
+  defaultBranchRef {
+    target {
+      ... on Commit { history(first: 100) { nodes { oid message committedDate } } }
+    }
+  }
+  pullRequests(first: 30, orderBy: {field: CREATED_AT, direction: DESC}) {
+    nodes { number state createdAt }
+  }
+  issues(first: 30, orderBy: {field: CREATED_AT, direction: DESC}) {
+    nodes { number state createdAt }
+  }
+  releases(first: 30, orderBy: {field: CREATED_AT, direction: DESC}) {
+    nodes { tagName name publishedAt }
+  }
+}
+"""
+# GraphQL points budgeted per detailed repo; the details query costs about one point in total
+POINTS_PER_DETAILED_REPO = 1
+
+def build_details_query(count: int) -> str:
+    """One aliased `repository` lookup per selected repo, all in a single query."""
+    params = "".join(f", $n{i}: String!" for i in range(count))
+    lookups = "\n".join(f"  r{i}: repository(owner: $owner, name: $n{i}) {{ ...RepoDetails }}" for i in range(count))
+    return f"query Details($owner: String!{params}) {{\n{lookups}\n}}\n{REPO_DETAILS_FRAGMENT}"
+
+class GraphQLCollector(GitHubCollector):
+    """
+    Collector backend that replaces the REST fan-out with GitHub GraphQL:
+    one query per 100 listed repos plus a single query for the details of
+    every selected repo. Answers are translated into the same RawProfile
+    the REST collector builds.
+    """
+    # Details come from the GraphQL point budget, not the REST 'core' limit
+    detail_resource = "graphql"
+
+    def detail_cost(self) -> int:
+        return POINTS_PER_DETAILED_REPO
+
+    async def _post_graphql(self, query: str, variables: Dict[str, Any], cache_endpoint: str) -> Dict[str, Any]:
+        # GraphQL is a POST so it can't use ETags; cache the query result keyed by its variables instead
+        cached = self.cache.get(cache_endpoint, variables) if self.cache else None
+        if cached and cached.fresh:
+            return cached.body
+
+        # GraphQL has its own point budget, tracked separately from the REST 'core' limit
+        response = await self._send("POST", f"{self.base_url}/graphql", resource="graphql",
+                                    json={"query": query, "variables": variables})
+        response.raise_for_status()
+        payload = response.json()
+        errors = payload.get("errors") or []
+        if any(err.get("type") == "NOT_FOUND" for err in errors):
+            # Surface missing users the same way the REST backend does (404)
+            raise httpx.HTTPStatusError(
+                errors[0].get("message", "Not Found"),
+                request=response.request,
+                response=httpx.Response(404, request=response.request, text=json.dumps(errors)),
+            )
+        if errors and not payload.get("data"):
+            raise Exception(f"GitHub GraphQL Error: {errors[0].get('message', 'unknown error')}")
+
+        data = payload["data"]
+        if self.cache:
+            self.cache.put(cache_endpoint, variables, json.dumps(data).encode())
+        return data
+
+    async def collect_profile(self, username: str, max_repos: Optional[int] = None) -> RawProfile:
+        user, repos, heads, cursor = None, [], {}, None
+        while True:
+            data = await self._post_graphql(PROFILE_QUERY, {"login": username, "cursor": cursor}, "graphql/profile")
+            user = data["user"]
+            connection = user["repositories"]
+            repos.extend(_translate_repo(node) for node in connection["nodes"])
+            # Head commits come with the listing, so snapshot checks need no extra query
+            heads.update((node["name"], ((node.get("defaultBranchRef") or {}).get("target") or {}).get("oid"))
+                         for node in connection["nodes"])
+            if not connection["pageInfo"]["hasNextPage"] or len(repos) >= settings.repo_max_count:
+                break
+            cursor = connection["pageInfo"]["endCursor"]
+        repos = repos[:settings.repo_max_count]
+
+        limit = self.detail_budget(max_repos or settings.repo_detail_limit)
+        top = rank_repos(repos, limit, settings.repo_rank_strategy)
+        reused, stale = await self.reuse_snapshots(username, top, heads)
+        repo_details = {}
+        if stale:
+            variables = {"owner": username, **{f"n{i}": repo.name for i, repo in enumerate(stale)}}
+            details = await self._post_graphql(build_details_query(len(stale)), variables, "graphql/details")
+            for i in range(len(stale)):
+                node = details.get(f"r{i}")
+                if node:
+                    repo_details[node["name"]] = _translate_details(node)
+            self.remember_snapshots(username, stale, repo_details)
+
+        return translate_profile(user, repos, repo_details, reused)
+
+def translate_profile(user: Dict[str, Any], repos: List[Repo],
+                      repo_details: Dict[str, RepoDetails],
+                      repo_features: Optional[Dict[str, Dict[str, Any]]] = None) -> RawProfile:
+    """Map PROFILE_QUERY user fields onto the REST collector's RawProfile."""
+    profile = User(
+        login=user["login"],
+        name=user.get("name"),
+        bio=user.get("bio"),
+        company=user.get("company"),
+        location=user.get("location"),
+        blog=user.get("blog"),
+        created_at=user.get("createdAt"),
+        followers=user["followers"]["totalCount"],
+        following=user["following"]["totalCount"],
+        public_repos=user["repositories"]["totalCount"],
+    )
+    return RawProfile(profile, repos, repo_details, repo_features)
+
+def _translate_repo(node: Dict[str, Any]) -> Repo:
+    return Repo(
+        name=node["name"],
+        fork=node["isFork"],
+        archived=node.get("isArchived", False),
+        created_at=node["createdAt"],
+        updated_at=node["updatedAt"],
+        pushed_at=node.get("pushedAt"),
+        stargazers_count=node.get("stargazerCount", 0),
+        forks_count=node.get("forkCount", 0),
+        language=(node.get("primaryLanguage") or {}).get("name"),
+    )
+
+def _translate_details(node: Dict[str, Any]) -> RepoDetails:
+    tree = node.get("object") or {}
+    target = (node.get("defaultBranchRef") or {}).get("target") or {}
+    history = (target.get("history") or {}).get("nodes", [])
+    pulls = [PullRequest(number=pr["number"], state=pr["state"].lower(), created_at=pr["createdAt"])
+             for pr in node["pullRequests"]["nodes"]]
+    issues = [Issue(number=issue["number"], state=issue["state"].lower(), created_at=issue["createdAt"],
+                    is_pull_request=False)
+              for issue in node["issues"]["nodes"]]
+
+    return RepoDetails(
+        languages={edge["node"]["name"]: edge["size"] for edge in node["languages"]["edges"]},
+        contents=[ContentEntry(name=entry["name"], type=_entry_type(entry["type"]))
+                  for entry in tree.get("entries", [])],
+        commits=[Commit(sha=c["oid"], message=c["message"], date=c["committedDate"]) for c in history],
+        pulls=pulls,
+        # The REST issues endpoint also lists pull requests, flagged as such
+        issues=_merge_issues(issues, pulls),
+        releases=[Release(tag_name=r["tagName"], name=r.get("name"), published_at=r.get("publishedAt"))
+                  for r in node["releases"]["nodes"]],
+    )
+
+def _entry_type(git_type: str) -> str:
+    return {"tree": "dir", "blob": "file", "commit": "submodule"}.get(git_type, git_type)
+
+def _merge_issues(issues: List[Issue], pulls: List[PullRequest]) -> List[Issue]:
+    merged = issues + [Issue(number=pr.number, state=pr.state, created_at=pr.created_at, is_pull_request=True)
+                       for pr in pulls]
+    merged.sort(key=lambda item: item.created_at, reverse=True)
+    return merged[:30]
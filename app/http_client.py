@@ -0,0 +1,41 @@
+import asyncio
+import httpx
+from typing import Dict, Optional
+from contextlib import asynccontextmanager
+from .config import settings
+
+# Shared connection pool for every outbound call (GitHub + AI providers).
+# Keeping one client per process lets HTTP/2 multiplex requests over a
+# handful of warm connections instead of a TLS handshake per call.
+_client: Optional[httpx.AsyncClient] = None
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=settings.http2_enabled,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_connections,
+            ),
+            timeout=httpx.Timeout(20.0),
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_limits.clear()
+
+@asynccontextmanager
+async def host_limit(url: str):
+    """Bound the number of in-flight requests against a single host."""
+    host = httpx.URL(url).host
+    semaphore = _host_limits.get(host)
+    if semaphore is None:
+        semaphore = _host_limits[host] = asyncio.Semaphore(settings.http_per_host_concurrency)
+    async with semaphore:
+        yield
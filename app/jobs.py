@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, NamedTuple, Optional
+
+from .collector import create_collector
+from .config import settings
+from .metrics import ANALYSES, detach_request_timings
+from .pipeline import analysis_key, analyze_shared, classify_failure
+from .store import ReportStore, TERMINAL_STATUSES, get_report_store
+
+logger = logging.getLogger(__name__)
+
+class _QueuedJob(NamedTuple):
+    id: str
+    username: str
+    resume_text: str
+    # Client tokens stay in memory only; they are never written to the store
+    token: Optional[str]
+
+class JobQueue:
+    """
+    Background analyses. A fixed pool of asyncio workers runs the pipeline
+    for queued jobs and records every state change in the ReportStore, so a
+    finished report outlives the request (and the connection) that asked
+    for it. Waiters are woken on each state change of a job.
+    """
+    def __init__(self, store: ReportStore, workers: int, max_pending: int):
+        self.store = store
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._tasks: List[asyncio.Task] = []
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    def start(self):
+        """Start the workers; the app does this at startup, submit() as a fallback."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, username: str, resume_text: str = "", token: Optional[str] = None) -> Dict[str, Any]:
+        """Queue an analysis and return its job record; raises asyncio.QueueFull when saturated."""
+        if self._queue.full():
+            raise asyncio.QueueFull()
+        self.start()
+        job = self.store.create_job(username)
+        self._changed[job["id"]] = asyncio.Event()
+        self._queue.put_nowait(_QueuedJob(job["id"], username, resume_text or "", token))
+        return job
+
+    async def wait(self, job_id: str, timeout: float):
+        """Return after the job's next state change, or after timeout."""
+        event = self._changed.get(job_id)
+        if event is None:
+            # Finished, or owned by another process: callers fall back to polling the store
+            await asyncio.sleep(min(timeout, 1.0))
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _update(self, job_id: str, **fields):
+        self.store.update_job(job_id, **fields)
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+            if fields.get("status") not in TERMINAL_STATUSES:
+                self._changed[job_id] = asyncio.Event()
+
+    async def _work(self):
+        # A worker started from a request inherits its context; jobs must not time into that request
+        detach_request_timings()
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: _QueuedJob):
+        self._update(job.id, status="running", started_at=time.time())
+        try:
+            collector = create_collector(token=job.token, max_wait=settings.batch_rate_limit_max_wait)
+            await analyze_shared(collector, job.username, job.resume_text)
+            # The pipeline stored the report (or an identical one, when coalesced or cached)
+            report_id = self.store.latest_report_id(*analysis_key(job.username, job.resume_text))
+            ANALYSES.labels(outcome="ok").inc()
+            self._update(job.id, status="done", finished_at=time.time(), report_id=report_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status_code, detail = classify_failure(e, job.username)
+            self._update(job.id, status="failed", finished_at=time.time(), status_code=status_code, error=detail)
+
+_job_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(get_report_store(), settings.job_workers, settings.job_queue_max)
+    return _job_queue
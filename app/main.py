@@ -1,32 +1,78 @@
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel, Field
-from typing import Optional
-import requests
+from typing import Optional, List, Annotated
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import logging
 
-from .collector import GitHubCollector
-from .engine import ScoringEngine
-from .ai_reasoning import AIReasoningEngine
-from .report import ReportGenerator
+from .collector import create_collector
+from .pipeline import analyze_shared, analyze_batch, classify_failure, stream_analysis
+from .rate_limit import get_scheduler
 from .config import settings
+from .http_client import close_client
+from .cache import get_llm_cache, get_response_cache, get_snapshot_cache
+from .metrics import ANALYSES, server_timing_header, start_request_timings
+from .jobs import get_job_queue
+from .store import TERMINAL_STATUSES, get_report_store
 
-app = FastAPI(title="SignalMatrix Repo")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    interrupted = get_report_store().fail_interrupted_jobs()
+    if interrupted:
+        logger.warning(f"Marked {interrupted} background jobs from a previous run as failed")
+    # Build the cohort percentile index now rather than on the first analysis
+    get_report_store().cohort()
+    # Start job workers outside any request, so they don't inherit a request's context
+    get_job_queue().start()
+    yield
+    await get_job_queue().stop()
+    # Release pooled GitHub/AI connections on shutdown
+    await close_client()
+
+app = FastAPI(title="SignalMatrix Repo", lifespan=lifespan)
 
 # Static files and templates
 # Mount the root 'static' folder to '/static' path
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    if not settings.server_timing_enabled:
+        return await call_next(request)
+    timings = start_request_timings()
+    response = await call_next(request)
+    if timings:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# GitHub username validation: alphanumeric and hyphens, 1-39 chars
+# Avoiding look-ahead as it's not supported by Pydantic's default regex engine
+Username = Annotated[str, Field(min_length=1, max_length=39, pattern=r"^[a-zA-Z\d-]+$")]
+
 class AnalysisRequest(BaseModel):
-    # GitHub username validation: alphanumeric and hyphens, 1-39 chars
-    # Avoiding look-ahead as it's not supported by Pydantic's default regex engine
-    username: str = Field(..., min_length=1, max_length=39, pattern=r"^[a-zA-Z\d-]+$")
+    username: Username
     resume_text: Optional[str] = ""
+    # Queue the analysis and return a job ID instead of holding the connection open
+    background: bool = False
+
+class BatchAnalysisRequest(BaseModel):
+    usernames: List[Username] = Field(default_factory=list, max_length=1000)
+    org: Optional[Username] = None
+
+def _extract_token(authorization: Optional[str]) -> Optional[str]:
+    # Extract token from Bearer header if present
+    if authorization and authorization.startswith("Bearer "):
+        logger.info("Using provided GitHub token from client.")
+        return authorization.split(" ")[1]
+    return None
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -39,60 +85,141 @@ async def read_root():
 
 @app.post("/api/analyze")
 async def analyze_profile(request: AnalysisRequest, authorization: Optional[str] = Header(None)):
+    if request.background:
+        try:
+            job = get_job_queue().submit(request.username, request.resume_text, _extract_token(authorization))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Too many queued analyses. Please try again later.")
+        logger.info(f"Queued analysis job {job['id']} for user: {request.username}")
+        return JSONResponse(status_code=202, content={
+            **job,
+            "status_url": f"/api/jobs/{job['id']}",
+            "events_url": f"/api/jobs/{job['id']}/events",
+        })
+
     try:
         logger.info(f"Starting analysis for user: {request.username}")
         
-        # Extract token from Bearer header if present
-        token = None
-        if authorization and authorization.startswith("Bearer "):
-            token = authorization.split(" ")[1]
-            logger.info("Using provided GitHub token from client.")
-        
-        collector = GitHubCollector(token=token)
-        
-        # Layer 1: Data Collection
-        user_data = collector.get_user(request.username)
-        repos = collector.get_repos(request.username)
-        
-        # Get details for top 5 repos to avoid massive API calls
-        repo_details = {}
-        for repo in repos[:5]:
-            name = repo["name"]
-            repo_details[name] = {
-                "languages": collector.get_languages(request.username, name),
-                "contents": collector.get_contents(request.username, name),
-                "commits": collector.get_commits(request.username, name),
-                "pulls": collector.get_pulls(request.username, name),
-                "issues": collector.get_issues(request.username, name),
-                "releases": collector.get_releases(request.username, name)
-            }
-            
-        full_data = {
-            "user": user_data,
-            "repos": repos,
-            "repo_details": repo_details
-        }
+        collector = create_collector(token=_extract_token(authorization))
+        report = await analyze_shared(collector, request.username, request.resume_text)
+        ANALYSES.labels(outcome="ok").inc()
+        return report
         
-        # Layer 2 & 3: Scoring
-        engine = ScoringEngine(full_data)
-        scoring_results = engine.calculate_metrics()
-        
-        # Layer 4: AI Reasoning
-        ai_engine = AIReasoningEngine()
-        ai_sections = ai_engine.generate_report_sections(scoring_results, request.resume_text)
-        
-        # Layer 5: Report Generation
-        return ReportGenerator.construct_final_report(scoring_results, ai_sections)
-        
-    except requests.exceptions.HTTPError as e:
-        status_code = e.response.status_code
-        logger.error(f"GitHub API Error ({status_code}) for user {request.username}: {e.response.text}")
-        detail = f"GitHub API Error: {status_code}"
-        if status_code == 401:
-            detail = "Authentication failed. Please verify the GITHUB_TOKEN."
-        elif status_code == 404:
-            detail = f"GitHub user '{request.username}' not found."
-        raise HTTPException(status_code=status_code, detail=detail)
     except Exception as e:
-        logger.error(f"Unexpected error during analysis for user {request.username}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error during analysis")
+        status_code, detail = classify_failure(e, request.username)
+        raise HTTPException(status_code=status_code, detail=detail)
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/analyze/stream")
+async def analyze_profile_stream(request: AnalysisRequest, authorization: Optional[str] = Header(None)):
+    """
+    Server-Sent Events variant of /api/analyze: a `scores` event as soon as
+    scoring is done, `ai_delta` events while the LLM writes, then `report`.
+    Failures arrive as an `error` event with the status /api/analyze would use.
+    """
+    logger.info(f"Starting streamed analysis for user: {request.username}")
+    collector = create_collector(token=_extract_token(authorization))
+
+    async def events():
+        try:
+            async for event, data in stream_analysis(collector, request.username, request.resume_text):
+                yield _sse(event, data)
+            ANALYSES.labels(outcome="ok").inc()
+        except Exception as e:
+            status_code, detail = classify_failure(e, request.username)
+            yield _sse("error", {"status": status_code, "detail": detail})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/analyze/batch")
+async def analyze_profiles_batch(request: BatchAnalysisRequest, authorization: Optional[str] = Header(None)):
+    if not request.usernames and not request.org:
+        raise HTTPException(status_code=400, detail="Provide a list of usernames or an organization.")
+
+    logger.info(f"Starting batch analysis: {len(request.usernames)} users, org={request.org}")
+    collector = create_collector(token=_extract_token(authorization),
+                                 max_wait=settings.batch_rate_limit_max_wait)
+
+    async def usernames():
+        for username in request.usernames:
+            yield username
+        if request.org:
+            async for username in collector.iter_org_members(request.org):
+                yield username
+
+    async def stream():
+        # One NDJSON line per user, flushed as soon as its analysis completes
+        async for result in analyze_batch(usernames(), collector):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def _job_view(job_id: str) -> dict:
+    job = get_report_store().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    if job["status"] == "done" and "report_id" in job:
+        stored = get_report_store().get_report(job["report_id"])
+        if stored is not None:
+            job["report"] = stored["report"]
+    return job
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    return _job_view(job_id)
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events: a `status` event per state change; the final one carries the report or error."""
+    job = _job_view(job_id)
+
+    async def events():
+        current = job
+        last_status = None
+        while True:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                yield _sse("status", current)
+            if current["status"] in TERMINAL_STATUSES:
+                return
+            await get_job_queue().wait(job_id, timeout=15)
+            refreshed = _job_view(job_id)
+            if refreshed["status"] == last_status:
+                # Keep proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+            current = refreshed
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/reports")
+async def list_reports(username: Optional[str] = None, limit: int = Query(50, ge=1, le=500),
+                       before: Optional[float] = None):
+    return {"reports": get_report_store().list_reports(username, limit, before)}
+
+@app.get("/api/reports/{report_id}")
+async def get_report(report_id: int):
+    stored = get_report_store().get_report(report_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Report {report_id} not found.")
+    return stored
+
+@app.get("/api/rate-limit")
+async def rate_limit_status():
+    return {"tokens": get_scheduler().snapshot()}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    cache, llm_cache = get_response_cache(), get_llm_cache()
+    stats = {"enabled": True, **cache.summary()} if cache is not None else {"enabled": False}
+    stats["llm"] = {"enabled": True, **llm_cache.summary()} if llm_cache is not None else {"enabled": False}
+    snapshots = get_snapshot_cache()
+    stats["repo_snapshots"] = {"enabled": True, **snapshots.summary()} if snapshots is not None else {"enabled": False}
+    return stats
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
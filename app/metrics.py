@@ -0,0 +1,140 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+LAYER_SECONDS = Histogram(
+    "signalmatrix_layer_duration_seconds",
+    "Time spent in each pipeline layer",
+    ["layer"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+UPSTREAM_SECONDS = Histogram(
+    "signalmatrix_upstream_request_duration_seconds",
+    "Latency of outbound GitHub and AI provider calls",
+    ["service", "endpoint", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30),
+)
+LLM_TOKENS = Counter(
+    "signalmatrix_llm_tokens_total",
+    "Tokens reported by the AI provider",
+    ["provider", "kind"],
+)
+ANALYSES = Counter(
+    "signalmatrix_analyses_total",
+    "Completed analyses by outcome",
+    ["outcome"],
+)
+
+# Per-request timings collected for the Server-Timing header; None outside a request
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("signalmatrix_timings", default=None)
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    timings: List[Tuple[str, float]] = []
+    _timings.set(timings)
+    return timings
+
+def detach_request_timings():
+    """Stop recording into the timings of the request this task was started from."""
+    _timings.set(None)
+
+def _record(name: str, seconds: float):
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+@contextmanager
+def layer_span(layer: str):
+    """Time one pipeline layer (collect, score, ai, report)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        LAYER_SECONDS.labels(layer=layer).observe(elapsed)
+        _record(layer, elapsed)
+
+def observe_upstream(service: str, endpoint: str, status: int, seconds: float):
+    UPSTREAM_SECONDS.labels(service=service, endpoint=endpoint, status=str(status)).observe(seconds)
+    _record(service, seconds)
+
+def record_llm_usage(provider: str, usage: Optional[Dict]):
+    if not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.labels(provider=provider, kind=kind.split("_")[0]).inc(usage[kind])
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """Aggregate spans by name: `collect;dur=812.4, github;dur=2301.0;desc="32 calls, summed"`."""
+    totals: Dict[str, List[float]] = {}
+    for name, seconds in timings:
+        entry = totals.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = []
+    for name, (seconds, count) in totals.items():
+        part = f"{name};dur={seconds * 1000:.1f}"
+        if count > 1:
+            part += f';desc="{count} calls, summed"'
+        parts.append(part)
+    return ", ".join(parts)
+
+class _StateCollector:
+    """Exports cache counters and rate-limit budget straight from their owners at scrape time."""
+    def describe(self):
+        # Without this, registering calls collect() at import time and opens every cache
+        return []
+
+    def collect(self):
+        from .cache import get_llm_cache, get_response_cache, get_snapshot_cache
+        from .circuit_breaker import breaker_states
+        from .rate_limit import get_scheduler
+
+        cache = get_response_cache()
+        if cache is not None:
+            events = CounterMetricFamily("signalmatrix_github_cache_events", "GitHub response cache events",
+                                         labels=["event"])
+            for event, count in cache.stats.items():
+                events.add_metric([event], count)
+            yield events
+            size = GaugeMetricFamily("signalmatrix_github_cache_bytes", "Bytes stored in the GitHub response cache")
+            size.add_metric([], cache.summary()["size_bytes"])
+            yield size
+
+        llm_cache = get_llm_cache()
+        if llm_cache is not None:
+            events = CounterMetricFamily("signalmatrix_llm_cache_events", "AI result cache events", labels=["event"])
+            for event, count in llm_cache.stats.items():
+                events.add_metric([event], count)
+            yield events
+
+        snapshots = get_snapshot_cache()
+        if snapshots is not None:
+            repos = CounterMetricFamily("signalmatrix_repo_snapshot_repos",
+                                        "Detailed repos reused from a snapshot vs refetched", labels=["outcome"])
+            for outcome, count in snapshots.stats.items():
+                repos.add_metric([outcome], count)
+            yield repos
+
+        circuits = GaugeMetricFamily("signalmatrix_ai_circuit_open",
+                                     "1 while calls to an AI provider are paused by its circuit breaker",
+                                     labels=["provider"])
+        for provider, state in breaker_states().items():
+            circuits.add_metric([provider], 0 if state == "closed" else 1)
+        yield circuits
+
+        remaining = GaugeMetricFamily("signalmatrix_github_rate_limit_remaining",
+                                      "Calls left in the current window across pooled tokens", labels=["resource"])
+        totals: Dict[str, int] = {}
+        for state in get_scheduler().snapshot():
+            if state["remaining"] is not None:
+                totals[state["resource"]] = totals.get(state["resource"], 0) + state["remaining"]
+        for resource, total in totals.items():
+            remaining.add_metric([resource], total)
+        yield remaining
+
+REGISTRY.register(_StateCollector())
@@ -0,0 +1,177 @@
+from typing import Any, Dict, List, Optional
+
+# Fields kept from each GitHub payload. REST objects carry dozens of URL
+# fields and nested objects; everything not listed here is dropped as soon
+# as a response is parsed, before it is cached or held by an analysis.
+USER_FIELDS = (
+    "login", "name", "bio", "company", "location", "blog", "created_at",
+    "followers", "following", "public_repos",
+)
+REPO_FIELDS = (
+    "name", "fork", "archived", "created_at", "updated_at", "pushed_at",
+    "stargazers_count", "forks_count", "language", "default_branch",
+)
+
+class Record:
+    """
+    A fixed set of fields in __slots__. The compact JSON form (as_dict) uses
+    the field names as keys, so from_dict reads it back; from_api projects a
+    full REST payload, which for most records has the same keys.
+    """
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_api(cls, payload: Dict[str, Any]) -> "Record":
+        return cls(**{name: payload.get(name) for name in cls.__slots__})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        return cls.from_api(data)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and self.as_dict() == other.as_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+class User(Record):
+    __slots__ = USER_FIELDS
+
+class Repo(Record):
+    __slots__ = REPO_FIELDS
+
+class Commit(Record):
+    __slots__ = ("sha", "message", "date")
+
+    @classmethod
+    def from_api(cls, payload: Dict[str, Any]) -> "Commit":
+        details = payload.get("commit")
+        if details is None:
+            # Already compact
+            return cls(**payload)
+        date = (details.get("author") or details.get("committer") or {}).get("date")
+        return cls(sha=payload.get("sha"), message=details.get("message", ""), date=date)
+
+class PullRequest(Record):
+    __slots__ = ("number", "state", "created_at")
+
+class Issue(Record):
+    __slots__ = ("number", "state", "created_at", "is_pull_request")
+
+    @classmethod
+    def from_api(cls, payload: Dict[str, Any]) -> "Issue":
+        # The REST issues endpoint also lists pull requests, flagged with a `pull_request` key
+        return cls(number=payload.get("number"), state=payload.get("state"), created_at=payload.get("created_at"),
+                   is_pull_request=bool(payload.get("is_pull_request") or "pull_request" in payload))
+
+class Release(Record):
+    __slots__ = ("tag_name", "name", "published_at")
+
+class ContentEntry(Record):
+    __slots__ = ("name", "type")
+
+# Record type of each list endpoint's items, by cache.ENDPOINT_TYPES kind
+LIST_RECORDS = {
+    "repos": Repo, "commits": Commit, "pulls": PullRequest, "issues": Issue,
+    "releases": Release, "contents": ContentEntry,
+}
+
+def project_payload(kind: str, body: Any) -> Any:
+    """Reduce a parsed REST body to its compact JSON form; kinds without a record pass through."""
+    if kind == "user" and isinstance(body, dict):
+        return User.from_api(body).as_dict()
+    record = LIST_RECORDS.get(kind)
+    if record is not None and isinstance(body, list):
+        return [record.from_api(item).as_dict() for item in body]
+    return body
+
+def _records(record, items: Optional[List[Any]]) -> List[Any]:
+    return [item if isinstance(item, record) else record.from_api(item) for item in items or []]
+
+class RepoDetails:
+    """
+    What a detailed fetch keeps for one repository. The REST backend fills
+    tree and commit_stats (summaries built while streaming); the GraphQL
+    backend and older fixtures fill contents and commits instead.
+    """
+    __slots__ = ("languages", "tree", "commit_stats", "contents", "commits", "pulls", "issues", "releases")
+
+    def __init__(self, languages: Optional[Dict[str, int]] = None, tree: Optional[Dict[str, Any]] = None,
+                 commit_stats: Optional[Dict[str, Any]] = None, contents: Optional[List[ContentEntry]] = None,
+                 commits: Optional[List[Commit]] = None, pulls: Optional[List[PullRequest]] = None,
+                 issues: Optional[List[Issue]] = None, releases: Optional[List[Release]] = None):
+        self.languages = languages or {}
+        self.tree = tree
+        self.commit_stats = commit_stats
+        self.contents = contents or []
+        self.commits = commits or []
+        self.pulls = pulls or []
+        self.issues = issues or []
+        self.releases = releases or []
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RepoDetails":
+        """Read the compact form, or a raw REST-shaped payload (e.g. a test fixture)."""
+        return cls(
+            languages=data.get("languages"),
+            tree=data.get("tree"),
+            commit_stats=data.get("commit_stats"),
+            contents=_records(ContentEntry, data.get("contents")),
+            commits=_records(Commit, data.get("commits")),
+            pulls=_records(PullRequest, data.get("pulls")),
+            issues=_records(Issue, data.get("issues")),
+            releases=_records(Release, data.get("releases")),
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "languages": self.languages,
+            "tree": self.tree,
+            "commit_stats": self.commit_stats,
+            **{field: [item.as_dict() for item in getattr(self, field)]
+               for field in ("contents", "commits", "pulls", "issues", "releases")},
+        }
+
+class RawProfile:
+    """
+    Everything the ScoringEngine reads for one user: the profile, every
+    listed repo, details for the top-ranked ones, and feature rows for
+    repos reused from an earlier analysis (see RepoSnapshotCache).
+    """
+    __slots__ = ("user", "repos", "repo_details", "repo_features")
+
+    def __init__(self, user: User, repos: List[Repo], repo_details: Optional[Dict[str, RepoDetails]] = None,
+                 repo_features: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.user = user
+        self.repos = repos
+        self.repo_details = repo_details or {}
+        self.repo_features = repo_features or {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RawProfile":
+        return cls(
+            user=User.from_api(data.get("user") or {}),
+            repos=_records(Repo, data.get("repos")),
+            repo_details={name: details if isinstance(details, RepoDetails) else RepoDetails.from_dict(details)
+                          for name, details in (data.get("repo_details") or {}).items()},
+            repo_features=data.get("repo_features"),
+        )
+
+    @classmethod
+    def coerce(cls, data: Any) -> "RawProfile":
+        return data if isinstance(data, cls) else cls.from_dict(data)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "user": self.user.as_dict(),
+            "repos": [repo.as_dict() for repo in self.repos],
+            "repo_details": {name: details.as_dict() for name, details in self.repo_details.items()},
+            "repo_features": self.repo_features,
+        }
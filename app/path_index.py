@@ -0,0 +1,174 @@
+import json
+import re
+from typing import Dict, Any, List, Optional
+
+# Deepest level tracked individually; deeper paths share the last histogram bucket
+MAX_TRACKED_DEPTH = 16
+
+TEST_DIRS = frozenset(["test", "tests", "__tests__", "spec", "specs", "testing"])
+TEST_FILE = re.compile(r"(^test_.*\.py$|_test\.(py|go|rb|exs?)$|\.(test|spec)\.[jt]sx?$|Tests?\.(java|kt|cs)$)")
+CI_FILES = frozenset([".gitlab-ci.yml", ".travis.yml", "jenkinsfile", "azure-pipelines.yml", "bitbucket-pipelines.yml"])
+CI_DIRS = (".github/workflows/", ".circleci/")
+
+_TREE_START = re.compile(r'"tree"\s*:\s*\[')
+_SEPARATOR = re.compile(r'[\s,]*')
+_TRUNCATED = re.compile(r'"truncated"\s*:\s*(true|false)')
+
+def _decode_entry(buffer: str, pos: int):
+    """
+    Decode the flat tree entry starting at pos, or return (None, pos) if it
+    hasn't fully arrived. Entries never nest objects, so the entry ends at
+    the first "}" that closes valid JSON; a "}" inside a path string leaves
+    an unterminated string, which fails to decode and moves on to the next.
+    """
+    end = buffer.find("}", pos)
+    while end != -1:
+        try:
+            return json.loads(buffer[pos:end + 1]), end + 1
+        except ValueError:
+            end = buffer.find("}", end + 1)
+    return None, pos
+
+class PathIndex:
+    """
+    Compact summary of a repository's file tree: counts, a depth histogram,
+    the root listing and whether Dockerfiles, CI config and tests appear
+    anywhere. Memory is bounded by the root listing, not the tree size.
+    """
+    __slots__ = ("files", "dirs", "depth_histogram", "root", "root_dirs",
+                 "has_dockerfile", "has_ci", "has_tests", "truncated")
+
+    def __init__(self):
+        self.files = 0
+        self.dirs = 0
+        self.depth_histogram: List[int] = [0] * (MAX_TRACKED_DEPTH + 1)
+        self.root: List[str] = []
+        self.root_dirs: List[str] = []
+        self.has_dockerfile = False
+        self.has_ci = False
+        self.has_tests = False
+        self.truncated = False
+
+    @property
+    def entries(self) -> int:
+        return self.files + self.dirs
+
+    def add(self, path: str, kind: str):
+        parts = path.split("/")
+        name = parts[-1].lower()
+        if kind == "tree":
+            self.dirs += 1
+            if len(parts) == 1:
+                self.root.append(parts[0])
+                self.root_dirs.append(parts[0])
+            if name in TEST_DIRS:
+                self.has_tests = True
+            return
+        if kind != "blob":
+            # Submodules ("commit") are neither files nor directories of this repo
+            return
+
+        self.files += 1
+        self.depth_histogram[min(len(parts), MAX_TRACKED_DEPTH)] += 1
+        if len(parts) == 1:
+            self.root.append(parts[0])
+        lowered = path.lower()
+        if name == "dockerfile" or name.startswith("dockerfile.") or name.endswith(".dockerfile"):
+            self.has_dockerfile = True
+        if name in CI_FILES or lowered.startswith(CI_DIRS):
+            self.has_ci = True
+        if not self.has_tests and TEST_FILE.search(parts[-1]):
+            self.has_tests = True
+
+    def depth_percentile(self, pct: float) -> int:
+        """File depth (path components) below which pct% of files sit."""
+        if not self.files:
+            return 0
+        threshold = self.files * pct / 100
+        seen = 0
+        for depth, count in enumerate(self.depth_histogram):
+            seen += count
+            if seen >= threshold:
+                return depth
+        return MAX_TRACKED_DEPTH
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "dirs": self.dirs,
+            "depth_histogram": self.depth_histogram,
+            "depth_p90": self.depth_percentile(90),
+            "root": self.root,
+            "root_dirs": self.root_dirs,
+            "has_dockerfile": self.has_dockerfile,
+            "has_ci": self.has_ci,
+            "has_tests": self.has_tests,
+            "truncated": self.truncated,
+        }
+
+class TreeParser:
+    """
+    Incremental parser for a `git/trees/{ref}?recursive=1` response body.
+    Feed it text chunks as they arrive; each complete tree entry is folded
+    into the PathIndex and dropped, so only the unparsed tail is buffered.
+    Stops indexing (and marks the result truncated) after max_entries.
+    """
+    def __init__(self, max_entries: Optional[int] = None):
+        self.index = PathIndex()
+        self.max_entries = max_entries
+        self._buffer = ""
+        # prefix -> tree -> tail; or stopped once max_entries is reached
+        self._state = "prefix"
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; returns False once the rest of the body is not needed."""
+        if self._state == "stopped":
+            return False
+        self._buffer += chunk
+        if self._state == "prefix":
+            start = _TREE_START.search(self._buffer)
+            if start is None:
+                self._check_truncated(self._buffer)
+                # Keep enough of the tail to match the marker across chunk boundaries
+                self._buffer = self._buffer[-64:]
+                return True
+            self._check_truncated(self._buffer[:start.start()])
+            self._buffer = self._buffer[start.end():]
+            self._state = "tree"
+        if self._state == "tree":
+            self._parse_entries()
+        # In the tail only the closing fields ("truncated": ...) remain, which are small
+        return self._state != "stopped"
+
+    def _parse_entries(self):
+        buffer, pos = self._buffer, 0
+        while True:
+            pos = _SEPARATOR.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == "]":
+                self._state = "tail"
+                pos += 1
+                break
+            item, end = _decode_entry(buffer, pos)
+            if item is None:
+                break
+            self.index.add(item.get("path", ""), item.get("type", ""))
+            pos = end
+            if self.max_entries is not None and self.index.entries >= self.max_entries:
+                self.index.truncated = True
+                self._state = "stopped"
+                break
+        self._buffer = buffer[pos:]
+
+    def _check_truncated(self, text: str):
+        match = _TRUNCATED.search(text)
+        if match and match.group(1) == "true":
+            self.index.truncated = True
+
+    def close(self) -> PathIndex:
+        if self._state == "tail":
+            self._check_truncated(self._buffer)
+        elif self._state == "tree":
+            # Body ended inside the array: index what arrived and say so
+            self.index.truncated = True
+        self._buffer = ""
+        return self.index
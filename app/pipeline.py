@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import httpx
+import logging
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+
+from .collector import GitHubCollector
+from .engine import ScoringEngine
+from .models import RawProfile
+from .ai_reasoning import AIReasoningEngine
+from .report import ReportGenerator
+from .cache import TTLCache
+from .singleflight import SingleFlight, StreamFlight
+from .metrics import ANALYSES, layer_span
+from .rate_limit import RateLimitExceeded
+from .store import get_report_store
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_analysis_flight = SingleFlight()
+_stream_flight = StreamFlight()
+_report_cache = TTLCache(settings.report_cache_ttl, settings.report_cache_max_entries)
+
+async def run_analysis(collector: GitHubCollector, username: str, resume_text: str = "") -> Dict[str, Any]:
+    """Run layers 1-5 for a single user and return the final report."""
+    report, _ = await _analyze(collector, username, resume_text)
+    return report
+
+async def _analyze(collector: GitHubCollector, username: str, resume_text: str) -> Tuple[Dict[str, Any], RawProfile]:
+    # Layer 1: Data Collection
+    with layer_span("collect"):
+        full_data = await collector.collect_profile(username)
+
+    # Layer 2 & 3: Scoring
+    with layer_span("score"):
+        engine = ScoringEngine(full_data, cohort=get_report_store().cohort())
+        scoring_results = engine.calculate_metrics()
+
+    # Layer 4: AI Reasoning
+    with layer_span("ai"):
+        ai_engine = AIReasoningEngine()
+        ai_sections = await ai_engine.generate_report_sections(scoring_results, resume_text)
+
+    # Layer 5: Report Generation
+    with layer_span("report"):
+        return ReportGenerator.construct_final_report(scoring_results, ai_sections), full_data
+
+async def stream_analysis(collector: GitHubCollector, username: str,
+                          resume_text: str = "") -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    run_analysis for progressive rendering. Yields ("scores", ...) as soon as
+    scoring finishes, ("ai_delta", {"text": ...}) for each streamed LLM chunk,
+    then ("report", ...) with the same report run_analysis returns.
+    Concurrent streams of the same (username, resume) share one producer and
+    all receive every event; a stream arriving while a plain analysis of the
+    same key runs waits for that report instead of starting its own.
+    """
+    key = analysis_key(username, resume_text)
+    if settings.report_cache_ttl > 0:
+        report = _report_cache.get(key)
+        if report is not None:
+            yield "scores", report
+            yield "report", report
+            return
+
+    if key in _analysis_flight and key not in _stream_flight:
+        report = await analyze_shared(collector, username, resume_text)
+        yield "scores", report
+        yield "report", report
+        return
+
+    async for event in _stream_flight.subscribe(key, lambda: _produce_stream(collector, key, resume_text)):
+        yield event
+
+async def _produce_stream(collector: GitHubCollector, key: tuple,
+                          resume_text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    with layer_span("collect"):
+        full_data = await collector.collect_profile(key[0])
+
+    with layer_span("score"):
+        scoring_results = ScoringEngine(full_data, cohort=get_report_store().cohort()).calculate_metrics()
+    yield "scores", ReportGenerator.construct_score_section(scoring_results)
+
+    ai_sections: Dict[str, Any] = {}
+    with layer_span("ai"):
+        async for kind, value in AIReasoningEngine().stream_report_sections(scoring_results, resume_text):
+            if kind == "delta":
+                yield "ai_delta", {"text": value}
+            else:
+                ai_sections = value
+
+    with layer_span("report"):
+        report = ReportGenerator.construct_final_report(scoring_results, ai_sections)
+    _remember(key, report, full_data)
+    yield "report", report
+
+def _remember(key: tuple, report: Dict[str, Any], profile: RawProfile):
+    """Keep a freshly computed report: in the report cache if enabled, and always in the store."""
+    if settings.report_cache_ttl > 0:
+        _report_cache.put(key, report)
+    get_report_store().save_report(key[0], key[1], report, profile.as_dict())
+
+def analysis_key(username: str, resume_text: str = "") -> tuple:
+    return (username.lower(), hashlib.sha256((resume_text or "").encode("utf-8")).hexdigest())
+
+async def analyze_shared(collector: GitHubCollector, username: str, resume_text: str = "") -> Dict[str, Any]:
+    """
+    run_analysis with request coalescing: concurrent analyses of the same
+    (username, resume) share one computation, and with REPORT_CACHE_TTL set
+    a finished report is reused for that many seconds.
+    """
+    key = analysis_key(username, resume_text)
+    if settings.report_cache_ttl > 0:
+        report = _report_cache.get(key)
+        if report is not None:
+            logger.info(f"Serving cached report for user: {username}")
+            return report
+
+    async def compute():
+        if key in _stream_flight:
+            # A streamed analysis of the same key is already running
+            async for kind, data in _stream_flight.subscribe(key, lambda: _produce_stream(collector, key, resume_text)):
+                if kind == "report":
+                    return data
+        report, profile = await _analyze(collector, username, resume_text)
+        _remember(key, report, profile)
+        return report
+
+    return await _analysis_flight.do(key, compute)
+
+def classify_failure(e: Exception, username: str) -> Tuple[int, str]:
+    """Map an analysis failure to (HTTP status, client-facing detail), logging it once."""
+    if isinstance(e, httpx.HTTPStatusError):
+        status_code = e.response.status_code
+        logger.error(f"GitHub API Error ({status_code}) for user {username}: {e.response.text}")
+        ANALYSES.labels(outcome="github_error").inc()
+        detail = f"GitHub API Error: {status_code}"
+        if status_code == 401:
+            detail = "Authentication failed. Please verify the GITHUB_TOKEN."
+        elif status_code == 404:
+            detail = f"GitHub user '{username}' not found."
+        return status_code, detail
+    if isinstance(e, RateLimitExceeded):
+        logger.error(f"Rate limit budget exhausted for user {username}")
+        ANALYSES.labels(outcome="rate_limited").inc()
+        return 429, str(e)
+    logger.error(f"Unexpected error during analysis for user {username}: {str(e)}")
+    ANALYSES.labels(outcome="error").inc()
+    return 500, "Internal server error during analysis"
+
+def describe_error(e: Exception) -> str:
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"GitHub API Error: {e.response.status_code}"
+    return str(e)
+
+async def _iterate(usernames) -> AsyncIterator[str]:
+    if hasattr(usernames, "__aiter__"):
+        async for username in usernames:
+            yield username
+    else:
+        for username in usernames:
+            yield username
+
+async def analyze_batch(usernames, collector: GitHubCollector,
+                        workers: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze many users with a bounded worker pool, yielding one result per
+    user as soon as it finishes. Usernames are de-duplicated case-insensitively.
+    All workers share the collector, so they share its response cache and
+    the scheduler's token pool. Queues are bounded, so only a handful of
+    reports are held in memory at any time.
+    """
+    workers = workers or settings.batch_workers
+    pending: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    results: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+
+    async def feed():
+        seen = set()
+        try:
+            async for username in _iterate(usernames):
+                # GitHub logins are case-insensitive
+                if username.lower() not in seen:
+                    seen.add(username.lower())
+                    await pending.put(username)
+        except Exception as e:
+            logger.error(f"Failed to list batch usernames: {str(e)}")
+            await results.put({"username": None, "error": describe_error(e)})
+        finally:
+            for _ in range(workers):
+                await pending.put(None)
+
+    async def work():
+        while (username := await pending.get()) is not None:
+            try:
+                report = await analyze_shared(collector, username)
+                await results.put({"username": username, "report": report})
+            except Exception as e:
+                logger.error(f"Batch analysis failed for user {username}: {str(e)}")
+                await results.put({"username": username, "error": describe_error(e)})
+        await results.put(None)
+
+    tasks = [asyncio.create_task(feed())] + [asyncio.create_task(work()) for _ in range(workers)]
+    try:
+        finished = 0
+        while finished < workers:
+            item = await results.get()
+            if item is None:
+                finished += 1
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
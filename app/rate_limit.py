@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import httpx
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+class RateLimitExceeded(Exception):
+    pass
+
+class TokenState:
+    """Rate-limit budget of one token for one GitHub resource ('core', 'graphql', ...)."""
+    __slots__ = ("token", "resource", "limit", "remaining", "reset_at", "blocked_until", "next_slot")
+
+    def __init__(self, token: str, resource: str):
+        self.token = token
+        self.resource = resource
+        self.limit: Optional[int] = None
+        # Unknown until GitHub reports it on the first response
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+        self.next_slot = 0.0
+
+    def available_at(self, now: float) -> float:
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at > now:
+            return max(self.blocked_until, self.reset_at)
+        return self.blocked_until
+
+    def budget(self) -> float:
+        return float("inf") if self.remaining is None else self.remaining
+
+class RateLimitScheduler:
+    """
+    Central pacing for every GitHub call in the process.
+    Reads X-RateLimit-* and Retry-After from each response, rotates over a
+    pool of configured tokens, spreads the remaining budget evenly until
+    the window resets, and queues callers when every token is exhausted.
+    """
+    def __init__(self, tokens: List[str], pace_below: int, max_extra_tokens: int = 1024):
+        self.pace_below = pace_below
+        self.max_extra_tokens = max_extra_tokens
+        self._pool: Dict[Tuple[str, str], TokenState] = {}
+        # Client-supplied (BYOT) tokens, keyed by digest and only offered to requests that carry them
+        self._extra: "OrderedDict[Tuple[str, str], TokenState]" = OrderedDict()
+        self._tokens = list(dict.fromkeys(t for t in tokens if t))
+
+    def _state(self, token: str, resource: str) -> TokenState:
+        key = (token, resource)
+        if token in self._tokens:
+            if key not in self._pool:
+                self._pool[key] = TokenState(token, resource)
+            return self._pool[key]
+
+        key = (hashlib.sha256(token.encode()).hexdigest(), resource)
+        state = self._extra.get(key)
+        if state is None:
+            state = self._extra[key] = TokenState(token, resource)
+            if len(self._extra) > self.max_extra_tokens:
+                self._extra.popitem(last=False)
+        self._extra.move_to_end(key)
+        return state
+
+    async def acquire(self, resource: str = "core", extra_token: Optional[str] = None,
+                      max_wait: Optional[float] = None) -> TokenState:
+        """Reserve one call on the token with the most budget left, waiting if none has any."""
+        max_wait = settings.github_rate_limit_max_wait if max_wait is None else max_wait
+        deadline = time.time() + max_wait
+        while True:
+            # No awaits between reading and reserving budget, so this is atomic on the event loop
+            now = time.time()
+            candidates = [self._state(t, resource) for t in self._tokens]
+            if extra_token:
+                candidates.append(self._state(extra_token, resource))
+            if not candidates:
+                # No GITHUB_TOKEN and no client token: share GitHub's unauthenticated (per-IP) budget
+                candidates.append(self._anonymous(resource))
+            for state in candidates:
+                if state.remaining is not None and state.reset_at and state.reset_at <= now:
+                    state.remaining = state.limit
+
+            ready = [s for s in candidates if s.available_at(now) <= now]
+            if ready:
+                state = max(ready, key=TokenState.budget)
+                delay = self._reserve(state, now)
+                break
+            wake_at = min(s.available_at(now) for s in candidates)
+
+            if wake_at > deadline:
+                raise RateLimitExceeded(
+                    "GitHub API rate limit exceeded. Please try again later or use a token with higher limits."
+                )
+            logger.warning(f"All GitHub tokens exhausted for '{resource}', queueing for {wake_at - now:.0f}s")
+            await asyncio.sleep(wake_at - now)
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return state
+
+    def _anonymous(self, resource: str) -> TokenState:
+        key = ("", resource)
+        if key not in self._pool:
+            self._pool[key] = TokenState("", resource)
+        return self._pool[key]
+
+    def _reserve(self, state: TokenState, now: float) -> float:
+        if state.remaining is None:
+            return 0.0
+        state.remaining -= 1
+        if state.remaining >= self.pace_below or state.reset_at <= now:
+            return 0.0
+        # Low on budget: space calls evenly over what is left of the window
+        interval = (state.reset_at - now) / max(state.remaining, 1)
+        slot = max(now, state.next_slot)
+        state.next_slot = slot + interval
+        return slot - now
+
+    def observe(self, state: TokenState, response: httpx.Response) -> bool:
+        """Record the budget reported by GitHub. Returns True if the call was rate limited."""
+        headers = response.headers
+        now = time.time()
+        if "X-RateLimit-Remaining" in headers:
+            state.remaining = int(headers["X-RateLimit-Remaining"])
+            state.limit = int(headers.get("X-RateLimit-Limit", state.limit or 0)) or state.limit
+            state.reset_at = float(headers.get("X-RateLimit-Reset", state.reset_at))
+
+        if response.status_code not in (403, 429):
+            return False
+        if "Retry-After" in headers:
+            # Secondary (abuse) rate limit
+            state.blocked_until = now + float(headers["Retry-After"])
+            return True
+        if state.remaining == 0:
+            state.blocked_until = max(state.blocked_until, state.reset_at)
+            return True
+        if response.status_code == 429 or "rate limit" in response.text.lower():
+            # Secondary limit without Retry-After: GitHub asks to back off for at least a minute
+            state.blocked_until = now + 60
+            return True
+        return False
+
+    def available(self, resource: str = "core", extra_token: Optional[str] = None) -> Optional[int]:
+        """Calls left across the tokens a request may use, or None while still unknown."""
+        now = time.time()
+        states = [self._state(t, resource) for t in self._tokens]
+        if extra_token:
+            states.append(self._state(extra_token, resource))
+        total = 0
+        for state in states:
+            if state.remaining is None:
+                return None
+            if state.available_at(now) <= now:
+                window_over = state.reset_at and state.reset_at <= now
+                total += (state.limit or state.remaining) if window_over else state.remaining
+        return total
+
+    def snapshot(self) -> List[Dict]:
+        return [
+            {"resource": s.resource, "remaining": s.remaining, "limit": s.limit,
+             "reset_at": s.reset_at, "blocked_until": s.blocked_until}
+            for s in self._pool.values()
+        ]
+
+_scheduler: Optional[RateLimitScheduler] = None
+
+def get_scheduler() -> RateLimitScheduler:
+    global _scheduler
+    if _scheduler is None:
+        extra = [t.strip() for t in settings.github_tokens.split(",")]
+        _scheduler = RateLimitScheduler([settings.github_token] + extra, settings.github_pace_below)
+    return _scheduler
@@ -2,7 +2,8 @@ from typing import Dict, Any
 
 class ReportGenerator:
     @staticmethod
-    def construct_final_report(scoring: Dict[str, Any], ai_sections: Dict[str, Any]) -> Dict[str, Any]:
+    def construct_score_section(scoring: Dict[str, Any]) -> Dict[str, Any]:
+        """The deterministic part of the report, available before the AI sections."""
         return {
             "overall_score": f"{scoring['total_score']}/50",
             "recruiter_decision": scoring["decision"],
@@ -14,6 +15,15 @@ class ReportGenerator:
             "maturity_trend": scoring["maturity_trend"],
             "complexity_classification": scoring["complexity_class"],
             "benchmark_position": scoring["benchmark_position"],
+            "primary_language": scoring["primary_language"],
+            # Per-metric percentiles within the language cohort; None until enough profiles are stored
+            "cohort": scoring["cohort"],
+        }
+
+    @staticmethod
+    def construct_final_report(scoring: Dict[str, Any], ai_sections: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **ReportGenerator.construct_score_section(scoring),
             "executive_summary": ai_sections.get("executive_summary", "N/A"),
             "recruiter_reasoning": ai_sections.get("recruiter_reasoning", "N/A"),
             "readme_evaluation": ai_sections.get("readme_evaluation", "N/A"),
@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cohort import CohortIndex
+from .config import settings
+from .engine import ScoringEngine
+from .report import ReportGenerator
+from .store import ReportStore
+
+logger = logging.getLogger(__name__)
+
+# Cohort every worker ranks against, handed over once by the pool initializer
+_worker_cohort: Optional[CohortIndex] = None
+
+def _init_worker(cohort: Optional[CohortIndex]):
+    global _worker_cohort
+    _worker_cohort = cohort
+
+def score_rows(rows: List[Tuple[int, bytes, bytes]], cohort: Optional[CohortIndex] = None
+               ) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Tuple[int, str]]]:
+    """
+    Re-score stored (report_id, profile body, report body) rows. The score
+    section of each report is recomputed from its profile; AI sections are
+    kept as they were. Returns (updated reports, failures).
+    """
+    cohort = cohort if cohort is not None else _worker_cohort
+    updated, failed = [], []
+    for report_id, profile, body in rows:
+        try:
+            scoring = ScoringEngine(json.loads(profile), cohort=cohort).calculate_metrics()
+            updated.append((report_id, {**json.loads(body), **ReportGenerator.construct_score_section(scoring)}))
+        except Exception as e:
+            failed.append((report_id, str(e)))
+    return updated, failed
+
+def rescore_profiles(store: ReportStore, workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                     progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Re-score every stored profile with the current ScoringEngine, without
+    GitHub or LLM calls. Chunks of profiles are scored across a process
+    pool while the parent streams the next ones from the store and writes
+    finished chunks back, one transaction each. Only a couple of chunks
+    per worker are in flight, so memory stays flat however many profiles
+    are stored. Every profile is ranked against the cohort as it stood
+    when the run started; afterwards every process using the store
+    rebuilds its cohort from the new scores.
+    """
+    workers = workers or settings.rescore_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or settings.rescore_chunk_size
+    cohort = store.cohort()
+    started = time.perf_counter()
+    stats = {"profiles": 0, "failed": 0, "seconds": 0.0, "per_second": 0.0}
+
+    def write(result: Tuple[List[Tuple[int, Dict[str, Any]]], List[Tuple[int, str]]]):
+        updated, failed = result
+        store.update_scores(updated)
+        for report_id, error in failed:
+            logger.error(f"Re-scoring report {report_id} failed: {error}")
+        elapsed = time.perf_counter() - started
+        stats["profiles"] += len(updated)
+        stats["failed"] += len(failed)
+        stats["seconds"] = round(elapsed, 3)
+        stats["per_second"] = round(stats["profiles"] / elapsed, 1) if elapsed else 0.0
+        if progress:
+            progress(dict(stats))
+
+    try:
+        if workers <= 1:
+            for rows in store.iter_profiles(chunk_size):
+                write(score_rows(rows, cohort))
+            return stats
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(cohort,)) as pool:
+            pending = set()
+            for rows in store.iter_profiles(chunk_size):
+                pending.add(pool.submit(score_rows, rows))
+                if len(pending) >= workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        write(future.result())
+            for future in pending:
+                write(future.result())
+        return stats
+    finally:
+        # Running servers (and this process) rank against the new scores from their next analysis
+        if stats["profiles"]:
+            store.invalidate_cohort()
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts
+    the work and everyone arriving while it runs awaits the same result.
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # Shielded so one caller disconnecting doesn't cancel the work for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            task.exception()
+
+class StreamFlight:
+    """
+    SingleFlight for async generators. The first subscriber to a key starts
+    one producer; every subscriber, including those arriving while it runs,
+    receives every item it produces: first the ones already produced, then
+    each new one as it arrives. The producer runs to completion even if all
+    subscribers go away, and its error is raised in each of them.
+    """
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Broadcast] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def subscribe(self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        broadcast = self._inflight.get(key)
+        if broadcast is None:
+            broadcast = self._inflight[key] = _Broadcast(fn())
+            broadcast.task.add_done_callback(lambda t: self._forget(key, broadcast))
+        async for item in broadcast.listen():
+            yield item
+
+    def _forget(self, key: Hashable, broadcast: "_Broadcast"):
+        if self._inflight.get(key) is broadcast:
+            del self._inflight[key]
+
+class _Broadcast:
+    def __init__(self, source: AsyncIterator[Any]):
+        self.items: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[Any]):
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        except BaseException as e:
+            self.error = e
+            raise
+        finally:
+            self.finished = True
+            self._notify()
+
+    def _notify(self):
+        # Wake everyone waiting on the current event; later waits use a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def listen(self) -> AsyncIterator[Any]:
+        seen = 0
+        while True:
+            while seen < len(self.items):
+                yield self.items[seen]
+                seen += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
@@ -0,0 +1,260 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from .cohort import CohortIndex, score_vector
+from .config import settings
+
+TERMINAL_STATUSES = ("done", "failed")
+
+def _score(report: Dict[str, Any]) -> Optional[int]:
+    try:
+        return int(str(report.get("overall_score", "")).split("/")[0])
+    except ValueError:
+        return None
+
+def _scores(report: Dict[str, Any]) -> Optional[str]:
+    total, breakdown = _score(report), report.get("signal_breakdown")
+    if total is None or not breakdown:
+        return None
+    return json.dumps(score_vector(total, breakdown), separators=(",", ":"))
+
+class ReportStore:
+    """
+    SQLite store for finished reports and background jobs.
+    Reports are append-only and indexed by (username, created_at) and
+    created_at, so "latest report for a user" and "recent reports" are
+    index lookups; jobs point at the report they produced. The latest
+    scores of each user also feed a CohortIndex, kept current on save.
+    Each user's latest compact RawProfile is kept next to the report it
+    produced, so reports can be re-scored without refetching (see rescore).
+    """
+    def __init__(self, path: str, cohort_min_size: int = 0):
+        self.cohort_min_size = cohort_min_size
+        self._cohort: Optional[CohortIndex] = None
+        self._cohort_generation = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, resume_hash TEXT NOT NULL, "
+            "created_at REAL NOT NULL, total_score INTEGER, decision TEXT, body BLOB NOT NULL, "
+            "primary_language TEXT, scores TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reports)")}
+        if "scores" not in columns:
+            # Stores created before cohort ranking; their reports are left out of the cohort
+            self._conn.execute("ALTER TABLE reports ADD COLUMN primary_language TEXT")
+            self._conn.execute("ALTER TABLE reports ADD COLUMN scores TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_username ON reports(username, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "username TEXT PRIMARY KEY, report_id INTEGER NOT NULL, stored_at REAL NOT NULL, body BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_profiles_report ON profiles(report_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, username TEXT NOT NULL, status TEXT NOT NULL, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, report_id INTEGER, status_code INTEGER, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at)")
+        # Store-wide counters shared by every process using the file (e.g. the cohort generation)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    # Reports
+
+    def save_report(self, username: str, resume_hash: str, report: Dict[str, Any],
+                    profile: Optional[Dict[str, Any]] = None) -> int:
+        """Append a report; `profile` is the RawProfile dict it was scored from, kept for re-scoring."""
+        body = json.dumps(report, separators=(",", ":")).encode("utf-8")
+        language, scores = report.get("primary_language"), _scores(report)
+        with self._lock:
+            previous = self._latest_scores(username) if self._cohort is not None and scores else None
+            cursor = self._conn.execute(
+                "INSERT INTO reports (username, resume_hash, created_at, total_score, decision, body, "
+                "primary_language, scores) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (username.lower(), resume_hash, time.time(), _score(report), report.get("recruiter_decision"), body,
+                 language, scores)
+            )
+            if self._cohort is not None and scores:
+                # Each user counts once in the cohort, with their latest scores
+                if previous:
+                    self._cohort.remove(*previous)
+                self._cohort.add(language, json.loads(scores))
+            if profile is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO profiles (username, report_id, stored_at, body) VALUES (?, ?, ?, ?)",
+                    (username.lower(), cursor.lastrowid, time.time(),
+                     json.dumps(profile, separators=(",", ":")).encode("utf-8"))
+                )
+            return cursor.lastrowid
+
+    def _latest_scores(self, username: str) -> Optional[Tuple[Optional[str], Dict[str, int]]]:
+        row = self._conn.execute(
+            "SELECT primary_language, scores FROM reports WHERE username = ? AND scores IS NOT NULL "
+            "ORDER BY id DESC LIMIT 1", (username.lower(),)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def cohort(self) -> CohortIndex:
+        """
+        The cohort of every user's latest scores, built from the store on
+        first use and rebuilt after another process re-scored the store.
+        """
+        with self._lock:
+            generation = self._generation()
+            if self._cohort is None or generation != self._cohort_generation:
+                # Count profiles per (language, metric, value) in SQLite rather than decoding every row
+                counts = self._conn.execute(
+                    "WITH latest AS (SELECT primary_language, scores FROM reports WHERE id IN "
+                    "(SELECT MAX(id) FROM reports WHERE scores IS NOT NULL GROUP BY username)) "
+                    "SELECT primary_language, metric.key, metric.value, COUNT(*) "
+                    "FROM latest, json_each(latest.scores) AS metric GROUP BY 1, 2, 3"
+                )
+                self._cohort = CohortIndex.build(counts, self.cohort_min_size)
+                self._cohort_generation = generation
+            return self._cohort
+
+    def _generation(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'cohort_generation'").fetchone()
+        return row[0] if row else 0
+
+    def invalidate_cohort(self):
+        """Make every process using this store rebuild its cohort on next use, e.g. after a re-score."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('cohort_generation', 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+            )
+
+    def iter_profiles(self, chunk_size: int) -> Iterator[List[Tuple[int, bytes, bytes]]]:
+        """Stored (report_id, profile body, report body) rows in report order, chunk_size at a time."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT p.report_id, p.body, r.body FROM profiles p JOIN reports r ON r.id = p.report_id "
+                    "WHERE p.report_id > ? ORDER BY p.report_id LIMIT ?", (last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def count_profiles(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def update_scores(self, rows: List[Tuple[int, Dict[str, Any]]]):
+        """
+        Replace the bodies of re-scored (report_id, report) pairs in one
+        transaction. The cohort is left as it was; call invalidate_cohort()
+        once the whole re-score is written.
+        """
+        params = [
+            (json.dumps(report, separators=(",", ":")).encode("utf-8"), _score(report),
+             report.get("recruiter_decision"), report.get("primary_language"), _scores(report), report_id)
+            for report_id, report in rows
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "UPDATE reports SET body = ?, total_score = ?, decision = ?, primary_language = ?, scores = ? "
+                    "WHERE id = ?", params
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_report(self, report_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, username, created_at, body FROM reports WHERE id = ?", (report_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "username": row[1], "created_at": row[2], "report": json.loads(row[3])}
+
+    def latest_report_id(self, username: str, resume_hash: Optional[str] = None) -> Optional[int]:
+        query = "SELECT id FROM reports WHERE username = ?"
+        params: list = [username.lower()]
+        if resume_hash is not None:
+            query += " AND resume_hash = ?"
+            params.append(resume_hash)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY created_at DESC LIMIT 1", params).fetchone()
+        return row[0] if row else None
+
+    def list_reports(self, username: Optional[str] = None, limit: int = 50,
+                     before: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Newest first, without report bodies; page with `before` = last created_at seen."""
+        clauses, params = [], []
+        if username:
+            clauses.append("username = ?")
+            params.append(username.lower())
+        if before is not None:
+            clauses.append("created_at < ?")
+            params.append(before)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, username, created_at, total_score, decision FROM reports {where}"
+                "ORDER BY created_at DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        return [
+            {"id": r[0], "username": r[1], "created_at": r[2], "total_score": r[3], "decision": r[4]}
+            for r in rows
+        ]
+
+    # Jobs
+
+    def create_job(self, username: str) -> Dict[str, Any]:
+        job = {"id": uuid.uuid4().hex, "username": username, "status": "queued", "created_at": time.time()}
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, username, status, created_at) VALUES (?, ?, ?, ?)",
+                (job["id"], username, job["status"], job["created_at"])
+            )
+        return self.get_job(job["id"])
+
+    def update_job(self, job_id: str, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, username, status, created_at, started_at, finished_at, report_id, status_code, error "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "username", "status", "created_at", "started_at", "finished_at",
+                "report_id", "status_code", "error")
+        return {k: v for k, v in zip(keys, row) if v is not None}
+
+    def fail_interrupted_jobs(self) -> int:
+        """Jobs left queued/running by a previous process will never finish; mark them failed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, status_code = 503, "
+                "error = 'Interrupted by a server restart' WHERE status IN ('queued', 'running')",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+_report_store: Optional[ReportStore] = None
+
+def get_report_store() -> ReportStore:
+    global _report_store
+    if _report_store is None:
+        _report_store = ReportStore(settings.report_store_path, settings.cohort_min_size)
+    return _report_store
@@ -0,0 +1,211 @@
+"""
+Local stand-in for api.github.com and the chat-completions providers.
+
+Replays the recorded responses in bench/fixtures (and the GraphQL fixtures
+in tests/fixtures) for any username, with configurable latency and
+rate-limit injection, and counts every call so benchmarks can report
+GitHub calls per analysis.
+
+    python -m bench.mock_server --port 9100 --latency-ms 80 --rate-limit 5000
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REST_FIXTURES = os.path.join(ROOT, "fixtures", "rest")
+GRAPHQL_FIXTURES = os.path.join(ROOT, "..", "tests", "fixtures")
+
+class MockConfig:
+    latency_ms = 0.0
+    jitter_ms = 0.0
+    rate_limit = 5000
+    window = 3600.0
+    # Answer every Nth call with a secondary rate limit (403 + Retry-After); 0 disables
+    secondary_every = 0
+    retry_after = 1
+    # Delay between streamed chat-completion chunks
+    stream_chunk_ms = 0.0
+    seed = 7
+
+config = MockConfig()
+stats: Counter = Counter()
+_buckets: Dict[str, list] = {}
+_rng = random.Random(config.seed)
+
+def _load(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.dumps(json.load(f))
+
+REST = {name[:-5]: _load(os.path.join(REST_FIXTURES, name)) for name in os.listdir(REST_FIXTURES)}
+CHAT = json.loads(_load(os.path.join(ROOT, "fixtures", "chat_completion.json")))
+GRAPHQL_PROFILE = _load(os.path.join(GRAPHQL_FIXTURES, "graphql_profile.json"))
+GRAPHQL_DETAILS = json.loads(_load(os.path.join(GRAPHQL_FIXTURES, "graphql_details.json")))["data"]
+
+app = FastAPI(title="SignalMatrix mock upstream")
+
+async def _latency():
+    if config.latency_ms or config.jitter_ms:
+        delay = max(0.0, _rng.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+def _rate_limit(request: Request, resource: str) -> Optional[Response]:
+    """Charge one call to the caller's token; returns an error response when throttled."""
+    token = request.headers.get("Authorization", "anonymous")
+    now = time.time()
+    bucket = _buckets.get(token)
+    if bucket is None or bucket[1] <= now:
+        bucket = _buckets[token] = [config.rate_limit, now + config.window]
+    headers = {
+        "X-RateLimit-Limit": str(config.rate_limit),
+        "X-RateLimit-Reset": str(int(bucket[1])),
+        "X-RateLimit-Resource": resource,
+    }
+    stats["github_calls"] += 1
+    if config.secondary_every and stats["github_calls"] % config.secondary_every == 0:
+        stats["secondary_limited"] += 1
+        return JSONResponse({"message": "You have exceeded a secondary rate limit."}, status_code=403,
+                            headers={**headers, "X-RateLimit-Remaining": str(bucket[0]),
+                                     "Retry-After": str(config.retry_after)})
+    if bucket[0] <= 0:
+        stats["rate_limited"] += 1
+        return JSONResponse({"message": "API rate limit exceeded"}, status_code=403,
+                            headers={**headers, "X-RateLimit-Remaining": "0"})
+    bucket[0] -= 1
+    request.state.bucket = bucket
+    request.state.rate_headers = {**headers, "X-RateLimit-Remaining": str(bucket[0])}
+    return None
+
+def _reply(request: Request, body: str, kind: str, headers: Optional[Dict] = None) -> Response:
+    etag = '"' + hashlib.md5(body.encode()).hexdigest() + '"'
+    headers = {**getattr(request.state, "rate_headers", {}), **(headers or {}), "ETag": etag}
+    if request.headers.get("If-None-Match") == etag:
+        # Like GitHub, conditional hits don't count against the rate limit
+        if hasattr(request.state, "bucket"):
+            request.state.bucket[0] += 1
+        stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    stats[kind] += 1
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/__stats")
+async def get_stats():
+    return dict(stats)
+
+@app.post("/__reset")
+async def reset_stats():
+    stats.clear()
+    _buckets.clear()
+    return {"ok": True}
+
+@app.get("/users/{login}")
+async def get_user(login: str, request: Request):
+    await _latency()
+    return _rate_limit(request, "core") or _reply(request, REST["user"].replace("benchuser", login), "user")
+
+@app.get("/users/{login}/repos")
+async def get_repos(login: str, request: Request, page: int = 1):
+    await _latency()
+    body = REST["repos"].replace("benchuser", login) if page == 1 else "[]"
+    return _rate_limit(request, "core") or _reply(request, body, "repos")
+
+@app.get("/orgs/{org}/members")
+async def get_members(org: str, request: Request, page: int = 1):
+    await _latency()
+    body = REST["org_members"] if page == 1 else "[]"
+    return _rate_limit(request, "core") or _reply(request, body, "org_members")
+
+@app.get("/repos/{owner}/{repo}/{kind}")
+async def get_repo_resource(owner: str, repo: str, kind: str, request: Request):
+    await _latency()
+    if kind not in ("languages", "contents", "commits", "pulls", "issues", "releases"):
+        return JSONResponse({"message": "Not Found"}, status_code=404)
+    body = REST[kind].replace("benchuser", owner).replace("REPO", repo)
+    return _rate_limit(request, "core") or _reply(request, body, kind)
+
+@app.get("/repos/{owner}/{repo}/contents/{path:path}")
+async def get_nested_contents(owner: str, repo: str, path: str, request: Request):
+    if not path:
+        # Root listing requested as `contents/`
+        return await get_repo_resource(owner, repo, "contents", request)
+    await _latency()
+    return _rate_limit(request, "core") or JSONResponse({"message": "Not Found"}, status_code=404)
+
+@app.get("/repos/{owner}/{repo}/git/trees/{ref:path}")
+async def get_tree(owner: str, repo: str, ref: str, request: Request):
+    await _latency()
+    body = REST["tree"].replace("benchuser", owner).replace("REPO", repo)
+    return _rate_limit(request, "core") or _reply(request, body, "tree")
+
+@app.post("/graphql")
+async def graphql(request: Request):
+    await _latency()
+    limited = _rate_limit(request, "graphql")
+    if limited:
+        return limited
+    payload = await request.json()
+    variables = payload.get("variables", {})
+    if payload["query"].lstrip().startswith("query Details"):
+        nodes = list(GRAPHQL_DETAILS.values())
+        data = {}
+        for i in range(len(variables) - 1):
+            node = dict(nodes[i % len(nodes)])
+            node["name"] = variables[f"n{i}"]
+            data[f"r{i}"] = node
+        return _reply(request, json.dumps({"data": data}), "graphql_details")
+    return _reply(request, GRAPHQL_PROFILE.replace("octocat", variables["login"]), "graphql_profile")
+
+async def _chat_stream(include_usage: bool):
+    content = CHAT["choices"][0]["message"]["content"]
+    base = {"id": CHAT["id"], "object": "chat.completion.chunk", "created": CHAT["created"], "model": CHAT["model"]}
+    for i in range(0, len(content), 24):
+        if config.stream_chunk_ms:
+            await asyncio.sleep(config.stream_chunk_ms / 1000)
+        chunk = {**base, "choices": [{"index": 0, "delta": {"content": content[i:i + 24]}, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+    if include_usage:
+        yield f"data: {json.dumps({**base, 'choices': [], 'usage': CHAT['usage']})}\n\n"
+    yield "data: [DONE]\n\n"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    await _latency()
+    stats["llm_calls"] += 1
+    payload = await request.json()
+    if payload.get("stream"):
+        include_usage = bool((payload.get("stream_options") or {}).get("include_usage"))
+        return StreamingResponse(_chat_stream(include_usage), media_type="text/event-stream")
+    return JSONResponse(CHAT)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--rate-limit", type=int, default=config.rate_limit, help="Calls per token per window")
+    parser.add_argument("--window", type=float, default=config.window, help="Rate-limit window in seconds")
+    parser.add_argument("--secondary-every", type=int, default=config.secondary_every)
+    parser.add_argument("--retry-after", type=int, default=config.retry_after)
+    parser.add_argument("--stream-chunk-ms", type=float, default=config.stream_chunk_ms)
+    args = parser.parse_args()
+
+    config.latency_ms, config.jitter_ms = args.latency_ms, args.jitter_ms
+    config.rate_limit, config.window = args.rate_limit, args.window
+    config.secondary_every, config.retry_after = args.secondary_every, args.retry_after
+    config.stream_chunk_ms = args.stream_chunk_ms
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
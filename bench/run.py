@@ -0,0 +1,241 @@
+"""
+Offline benchmark for the analysis pipeline.
+
+Starts the local GitHub/LLM stand-in (bench/mock_server.py) and the real
+app under uvicorn pointed at it, then drives /api/analyze and
+/api/analyze/batch at fixed concurrency levels. It reports latency
+percentiles, throughput, GitHub calls per analysis and the app's peak RSS.
+
+    python -m bench.run --concurrency 1,8,32 --requests 64 --latency-ms 80
+    python -m bench.run --output bench_output.json --compare previous.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """High-water mark of the app's resident memory (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+async def wait_ready(url: str, timeout: float = 20.0):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+def latency_summary(latencies: List[float], elapsed: float) -> Dict:
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "requests_per_sec": round(len(latencies) / elapsed, 2) if elapsed else None,
+    }
+
+async def run_analyze(client: httpx.AsyncClient, mock: httpx.AsyncClient, concurrency: int,
+                      requests: int, prefix: str) -> Dict:
+    await mock.post("/__reset")
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/api/analyze", json={"username": f"{prefix}-{i}"})
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    upstream = (await mock.get("/__stats")).json()
+    return {
+        "workload": "analyze",
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        **latency_summary(latencies, elapsed),
+        "github_calls_per_analysis": round(upstream.get("github_calls", 0) / max(len(latencies), 1), 2),
+        "llm_calls": upstream.get("llm_calls", 0),
+        "upstream": upstream,
+    }
+
+async def run_batch(client: httpx.AsyncClient, mock: httpx.AsyncClient, requests: int, prefix: str) -> Dict:
+    await mock.post("/__reset")
+    usernames = [f"{prefix}-{i}" for i in range(requests)]
+    arrivals, errors = [], 0
+    started = time.perf_counter()
+    async with client.stream("POST", "/api/analyze/batch", json={"usernames": usernames}) as response:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            arrivals.append(time.perf_counter() - started)
+            errors += "error" in json.loads(line)
+    elapsed = time.perf_counter() - started
+    upstream = (await mock.get("/__stats")).json()
+    return {
+        "workload": "batch",
+        "concurrency": None,
+        "requests": requests,
+        "errors": errors,
+        "first_result_ms": round(arrivals[0] * 1000, 1) if arrivals else None,
+        "total_ms": round(elapsed * 1000, 1),
+        "requests_per_sec": round(len(arrivals) / elapsed, 2) if elapsed else None,
+        "github_calls_per_analysis": round(upstream.get("github_calls", 0) / max(len(arrivals) - errors, 1), 2),
+        "llm_calls": upstream.get("llm_calls", 0),
+        "upstream": upstream,
+    }
+
+def print_table(results: List[Dict], baseline: Optional[Dict] = None):
+    header = f"{'workload':<9} {'conc':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'gh/analysis':>12} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    previous = {(r["workload"], r["concurrency"]): r for r in (baseline or {}).get("results", [])}
+    for r in results:
+        print(f"{r['workload']:<9} {str(r['concurrency'] or '-'):>5} {str(r.get('p50_ms', '-')):>9} "
+              f"{str(r.get('p95_ms', '-')):>9} {str(r.get('p99_ms', '-')):>9} {str(r['requests_per_sec']):>8} "
+              f"{str(r['github_calls_per_analysis']):>12} {r['errors']:>7}")
+        old = previous.get((r["workload"], r["concurrency"]))
+        if old:
+            deltas = []
+            for key in ("p50_ms", "p95_ms", "requests_per_sec", "github_calls_per_analysis"):
+                if r.get(key) and old.get(key):
+                    deltas.append(f"{key} {100 * (r[key] - old[key]) / old[key]:+.1f}%")
+            print(f"{'':<15}vs baseline: " + ", ".join(deltas))
+
+async def benchmark(args: argparse.Namespace) -> Dict:
+    mock_port, app_port = free_port(), free_port()
+    mock_url, app_url = f"http://127.0.0.1:{mock_port}", f"http://127.0.0.1:{app_port}"
+    workdir = tempfile.mkdtemp(prefix="signalmatrix-bench-")
+
+    mock = subprocess.Popen([
+        sys.executable, "-m", "bench.mock_server", "--port", str(mock_port),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--rate-limit", str(args.rate_limit), "--secondary-every", str(args.secondary_every),
+    ], cwd=ROOT)
+    env = {
+        **os.environ,
+        "GITHUB_API_URL": mock_url,
+        "OPENAI_API_URL": f"{mock_url}/v1/chat/completions",
+        "AI_PROVIDER": "openai",
+        "OPENAI_API_KEY": "bench-key",
+        "GITHUB_TOKEN": "bench-token",
+        "GITHUB_TOKENS": "",
+        "COLLECTOR_BACKEND": args.backend,
+        "CACHE_PATH": os.path.join(workdir, "cache.db"),
+        "REPORT_STORE_PATH": os.path.join(workdir, "reports.db"),
+        "GITHUB_CACHE_ENABLED": "true" if args.cache else "false",
+        # Every synthetic user gets the same mock data, so a cached LLM answer would serve them all
+        "LLM_CACHE_ENABLED": "true" if args.llm_cache else "false",
+        "REPORT_CACHE_TTL": "0",
+    }
+    log_path = os.path.join(workdir, "app.log")
+    app_log = open(log_path, "w")
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(app_port), "--log-level", "warning",
+    ], cwd=ROOT, env=env, stdout=app_log, stderr=subprocess.STDOUT)
+
+    results = []
+    try:
+        await wait_ready(f"{mock_url}/__stats")
+        await wait_ready(f"{app_url}/api/cache/stats")
+        timeout = httpx.Timeout(args.timeout)
+        limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+        async with httpx.AsyncClient(base_url=app_url, timeout=timeout, limits=limits) as client, \
+                httpx.AsyncClient(base_url=mock_url) as mock_client:
+            for level in args.concurrency:
+                if "analyze" in args.workload:
+                    results.append(await run_analyze(client, mock_client, level, args.requests, f"bench-c{level}"))
+            if "batch" in args.workload:
+                results.append(await run_batch(client, mock_client, args.requests, "bench-batch"))
+        rss = peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        mock.terminate()
+        server.wait()
+        mock.wait()
+        app_log.close()
+
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                            capture_output=True, text=True).stdout.strip()
+    return {
+        "commit": commit or None,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "peak_rss_mb": round(rss, 1) if rss else None,
+        "app_log": log_path,
+        "results": results,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="Analyses per concurrency level")
+    parser.add_argument("--workload", default="analyze,batch", help="analyze and/or batch")
+    parser.add_argument("--backend", default="rest", choices=["rest", "graphql"])
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="Disable the GitHub response cache")
+    parser.add_argument("--llm-cache", action="store_true",
+                        help="Keep the LLM response cache on (off by default, so every analysis calls the LLM)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Injected upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-limit", type=int, default=100000, help="Upstream calls per token per hour")
+    parser.add_argument("--secondary-every", type=int, default=0, help="Inject a secondary rate limit every N calls")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Print deltas against a previous --output file")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c]
+    args.workload = [w.strip() for w in args.workload.split(",") if w.strip()]
+
+    report = asyncio.run(benchmark(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(f"commit {report['commit']}  peak RSS {report['peak_rss_mb']} MB  "
+          f"LLM cache {'on' if args.llm_cache else 'off'}  app log {report['app_log']}")
+    print_table(report["results"], baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import ai_reasoning, circuit_breaker
+from app.ai_reasoning import AIReasoningEngine, Provider
+from app.cache import LLMCache
+from app.config import settings
+
+SIGNALS = {"total_score": 30}
+SECTIONS = {"executive_summary": "Ships production services.", "improvement_roadmap": {}}
+
+def completion() -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(SECTIONS)}}]})
+
+def make_engine(tmp_path, monkeypatch, handler, hedge=False):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ai_reasoning, "get_client", lambda: client)
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    engine = AIReasoningEngine(cache=LLMCache(str(tmp_path / "c.db"), 60, 10_000))
+    # Every call must reach the providers
+    engine.cache = None
+    engine.provider, engine.api_key, engine.url = "openai", "key", "http://primary.test/v1/chat/completions"
+    engine.hedge_providers = [Provider("blackbox", "key", "bb", "http://hedge.test/v1/chat/completions")] if hedge else []
+    return engine
+
+def test_breaker_trips_and_recovers_after_cooldown(tmp_path, monkeypatch):
+    calls = []
+    healthy = {"value": False}
+
+    def handler(request):
+        calls.append(request.url.host)
+        return completion() if healthy["value"] else httpx.Response(503, text="overloaded")
+
+    engine = make_engine(tmp_path, monkeypatch, handler)
+    for _ in range(5):
+        assert "error" in asyncio.run(engine.generate_report_sections(SIGNALS))
+    assert len(calls) == 5
+    breaker = circuit_breaker.get_breaker("openai")
+    assert breaker.state == "open"
+
+    # While open, the fallback comes back without calling the provider
+    result = asyncio.run(engine.generate_report_sections(SIGNALS))
+    assert "paused" in result["error"]
+    assert len(calls) == 5
+
+    # After the cooldown one trial call goes out and closes the circuit
+    breaker.cooldown = 0
+    healthy["value"] = True
+    assert asyncio.run(engine.generate_report_sections(SIGNALS)) == SECTIONS
+    assert breaker.state == "closed"
+    assert len(calls) == 6
+
+def test_slow_provider_is_hedged(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ai_hedge_delay", 0.05)
+
+    async def handler(request):
+        if request.url.host == "primary.test":
+            await asyncio.sleep(2)
+        return completion()
+
+    engine = make_engine(tmp_path, monkeypatch, handler, hedge=True)
+    started = time.perf_counter()
+    assert asyncio.run(engine.generate_report_sections(SIGNALS)) == SECTIONS
+    assert time.perf_counter() - started < 1
+    # The abandoned call was not slow enough to count against the primary
+    assert circuit_breaker.get_breaker("openai").state == "closed"
+
+def test_failures_fail_over_without_waiting_for_the_hedge_delay(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ai_hedge_delay", 10)
+
+    def handler(request):
+        return httpx.Response(429, text="insufficient_quota") if request.url.host == "primary.test" else completion()
+
+    engine = make_engine(tmp_path, monkeypatch, handler, hedge=True)
+    started = time.perf_counter()
+    assert asyncio.run(engine.generate_report_sections(SIGNALS)) == SECTIONS
+    assert time.perf_counter() - started < 1
+
+def test_latency_budget_bounds_the_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ai_latency_budget", 0.1)
+
+    async def handler(request):
+        await asyncio.sleep(2)
+        return completion()
+
+    engine = make_engine(tmp_path, monkeypatch, handler)
+    started = time.perf_counter()
+    result = asyncio.run(engine.generate_report_sections(SIGNALS))
+    assert time.perf_counter() - started < 1
+    assert "within 0.1s" in result["error"]
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+from fastapi.testclient import TestClient
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import cli, main, pipeline
+from app.pipeline import analyze_batch
+
+# Seconds each fake analysis takes, so completion order differs from input order
+DELAYS = {"slow": 0.15, "medium": 0.08, "fast": 0.01}
+
+def fake_analyses(monkeypatch):
+    calls = []
+
+    async def fake_analyze(collector, username, resume_text=""):
+        calls.append(username)
+        await asyncio.sleep(DELAYS.get(username.lower(), 0.01))
+        if username == "ghost":
+            request = httpx.Request("GET", "https://api.github.com/users/ghost")
+            raise httpx.HTTPStatusError("not found", request=request, response=httpx.Response(404, request=request))
+        return {"overall_score": "30/50", "login": username}
+
+    monkeypatch.setattr(pipeline, "analyze_shared", fake_analyze)
+    return calls
+
+async def collect(usernames, workers=4):
+    return [result async for result in analyze_batch(usernames, collector=None, workers=workers)]
+
+def test_results_stream_in_completion_order(monkeypatch):
+    fake_analyses(monkeypatch)
+    results = asyncio.run(collect(["slow", "medium", "fast"]))
+    assert [r["username"] for r in results] == ["fast", "medium", "slow"]
+    assert all(r["report"]["login"] == r["username"] for r in results)
+
+def test_a_failed_user_does_not_stop_the_batch(monkeypatch):
+    fake_analyses(monkeypatch)
+    results = asyncio.run(collect(["ghost", "slow", "fast"], workers=1))
+    assert results[0] == {"username": "ghost", "error": "GitHub API Error: 404"}
+    assert [r["username"] for r in results[1:]] == ["slow", "fast"]
+
+def test_usernames_are_deduplicated_case_insensitively(monkeypatch):
+    calls = fake_analyses(monkeypatch)
+    results = asyncio.run(collect(["Octocat", "octocat", "fast", "OCTOCAT"]))
+    assert sorted(calls) == ["Octocat", "fast"]
+    assert len(results) == 2
+
+def test_a_listing_failure_is_one_error_line(monkeypatch):
+    calls = fake_analyses(monkeypatch)
+
+    async def members():
+        raise RuntimeError("org listing failed")
+        yield
+
+    results = asyncio.run(collect(members()))
+    assert results == [{"username": None, "error": "org listing failed"}]
+    assert calls == []
+
+class FakeCollector:
+    def __init__(self, members, fail=False):
+        self.members = members
+        self.fail = fail
+
+    async def iter_org_members(self, org):
+        for member in self.members:
+            yield member
+        if self.fail:
+            raise RuntimeError(f"cannot list {org}")
+
+def test_batch_endpoint_streams_ndjson(monkeypatch):
+    calls = fake_analyses(monkeypatch)
+    monkeypatch.setattr(main, "create_collector", lambda **kwargs: FakeCollector(["fast", "Medium"]))
+
+    response = TestClient(main.app).post("/api/analyze/batch", json={"usernames": ["slow", "medium"], "org": "acme"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(r["username"] for r in lines) == ["fast", "medium", "slow"]
+    assert sorted(calls) == ["fast", "medium", "slow"]
+
+def test_batch_endpoint_reports_an_org_failure_and_ends(monkeypatch):
+    fake_analyses(monkeypatch)
+    monkeypatch.setattr(main, "create_collector", lambda **kwargs: FakeCollector([], fail=True))
+
+    response = TestClient(main.app).post("/api/analyze/batch", json={"org": "acme"})
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"username": None, "error": "cannot list acme"}]
+
+def test_batch_endpoint_needs_users_or_an_org():
+    assert TestClient(main.app).post("/api/analyze/batch", json={}).status_code == 400
+
+def test_cli_reads_arguments_and_files(tmp_path, monkeypatch, capsys):
+    calls = fake_analyses(monkeypatch)
+    monkeypatch.setattr(cli, "create_collector", lambda **kwargs: FakeCollector(["fast"]))
+    names = tmp_path / "users.txt"
+    names.write_text("medium\n\nghost\nSLOW\n", encoding="utf-8")
+
+    code = cli.main(["batch", "slow", "--file", str(names), "--org", "acme", "--workers", "2"])
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    # The ghost user failed, so the exit code says so
+    assert code == 1
+    assert sorted(calls) == ["fast", "ghost", "medium", "slow"]
+    assert {r["username"] for r in lines if "error" in r} == {"ghost"}
+    assert len(lines) == 4
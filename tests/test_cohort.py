@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import random
+import sys
+
+import httpx
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import ai_reasoning, pipeline
+from app.ai_reasoning import AIReasoningEngine
+from app.cache import LLMCache
+from app.cohort import CohortIndex
+from app.config import settings
+from app.engine import ScoringEngine
+from app.models import RawProfile
+from app.store import ReportStore
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def report(total, depth=5, language="Python"):
+    breakdown = {"consistency": 5, "depth": depth, "clarity": 5, "focus": 5, "production": 5}
+    return {"overall_score": f"{total}/50", "recruiter_decision": "Borderline",
+            "signal_breakdown": breakdown, "primary_language": language}
+
+def test_percentiles_match_a_sorted_scan():
+    rng = random.Random(3)
+    totals = [rng.randint(0, 50) for _ in range(500)]
+    index = CohortIndex(min_size=1)
+    for t in totals:
+        index.add(None, {"total": t})
+    for value in (0, 17, 28, 40, 50):
+        below = sum(t < value for t in totals)
+        ties = sum(t == value for t in totals)
+        assert index.percentile("*", "total", value) == round(100 * (below + ties / 2) / len(totals))
+
+def test_store_keeps_the_cohort_current(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.db"), cohort_min_size=3)
+    for i, total in enumerate((10, 20, 30)):
+        store.save_report(f"py{i}", "h", report(total, depth=i))
+    store.save_report("gopher", "h", report(45, language="Go"))
+
+    cohort = store.cohort()
+    assert cohort.size() == 4 and cohort.size("Python") == 3
+    ranked = cohort.rank("Python", {"total": 30, "depth": 2})
+    assert ranked == {"language": "Python", "size": 3, "percentiles": {"total": 83, "depth": 83}}
+    # Too few Go profiles: rank against everyone
+    assert cohort.rank("Go", {"total": 45})["language"] is None
+
+    # A re-analysis replaces the user's previous scores instead of adding a profile
+    store.save_report("PY0", "other-resume", report(40))
+    assert cohort.size("Python") == 3
+    assert cohort.rank("Python", {"total": 40})["percentiles"]["total"] == 83
+
+    # A fresh process rebuilds the same index from the stored reports
+    rebuilt = ReportStore(str(tmp_path / "reports.db"), cohort_min_size=3).cohort()
+    assert rebuilt.rank("Python", {"total": 40}) == cohort.rank("Python", {"total": 40})
+
+def test_engine_ranks_against_the_cohort():
+    with open(os.path.join(FIXTURES, "scoring_regression.json"), "r", encoding="utf-8") as f:
+        case = json.load(f)[0]
+    expected = case["expected"]
+    language = expected["primary_language"]
+    cohort = CohortIndex.build(((language, "total", t, 1) for t in range(51)), min_size=10)
+
+    results = ScoringEngine(case["raw_data"], cohort=cohort).calculate_metrics()
+    percentile = results["cohort"]["percentiles"]["total"]
+    assert results["cohort"]["language"] == language
+    assert results["benchmark_position"].startswith(f"{percentile}")
+    assert results["benchmark_position"].endswith(f"percentile of 51 {language} profiles")
+    assert results["breakdown"] == expected["breakdown"]
+
+    # Below min_size the fixed thresholds still apply
+    small = CohortIndex.build([(language, "total", 1, 1)], min_size=10)
+    assert ScoringEngine(case["raw_data"], cohort=small).calculate_metrics() == expected
+
+def test_an_empty_cohort_never_ranks():
+    assert CohortIndex(min_size=0).rank("Python", {"total": 30}) is None
+
+def test_a_growing_cohort_does_not_miss_the_llm_cache(tmp_path, monkeypatch):
+    with open(os.path.join(FIXTURES, "scoring_regression.json"), "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    # Two Python profiles; the second ranks below the first, so octocat stays Borderline as the cohort grows
+    profiles = {"octocat": RawProfile.from_dict(cases[0]["raw_data"]),
+                "other": RawProfile.from_dict(cases[6]["raw_data"])}
+    llm_calls = []
+
+    class FakeCollector:
+        async def collect_profile(self, username):
+            return profiles[username]
+
+    def chat(request):
+        llm_calls.append(request)
+        content = json.dumps({"executive_summary": "Ships services.", "improvement_roadmap": {}})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    llm = httpx.AsyncClient(transport=httpx.MockTransport(chat))
+    engine = AIReasoningEngine(cache=LLMCache(str(tmp_path / "llm.db"), 60, 100_000))
+    engine.api_key = "test-key"
+    store = ReportStore(str(tmp_path / "reports.db"), cohort_min_size=1)
+    monkeypatch.setattr(ai_reasoning, "get_client", lambda: llm)
+    monkeypatch.setattr(pipeline, "AIReasoningEngine", lambda: engine)
+    monkeypatch.setattr(pipeline, "get_report_store", lambda: store)
+    monkeypatch.setattr(settings, "report_cache_ttl", 0)
+
+    reports = [asyncio.run(pipeline.analyze_shared(FakeCollector(), username))
+               for username in ("octocat", "octocat", "other", "octocat")]
+    # The cohort grew between the analyses of octocat, but its sections came from the LLM cache
+    assert reports[3]["cohort"]["size"] == 2 and reports[1]["cohort"]["size"] == 1
+    assert len(llm_calls) == 2
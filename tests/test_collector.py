@@ -0,0 +1,231 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import ai_reasoning, pipeline
+from app.ai_reasoning import AIReasoningEngine
+from app.cache import LLMCache, RepoSnapshotCache, ResponseCache
+from app.collector import GitHubCollector, rank_repos
+from app.config import settings
+from app.graphql_collector import GraphQLCollector
+from app.models import Repo
+from app.rate_limit import RateLimitScheduler
+from app.store import ReportStore
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+LISTED = [{"name": f"repo{i}", "fork": i % 3 == 0, "stargazers_count": i, "url": f"https://api/{i}"}
+          for i in range(250)]
+
+def listing_handler(seen):
+    def handler(request):
+        seen.append(request)
+        page = int(request.url.params.get("page", "1"))
+        per_page = int(request.url.params["per_page"])
+        headers = {"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": str(time.time() + 3600)}
+        if page * per_page < len(LISTED):
+            headers["Link"] = (f'<{request.url.copy_set_param("page", str(page + 1))}>; rel="next", '
+                               f'<{request.url.copy_set_param("page", "3")}>; rel="last"')
+        return httpx.Response(200, json=LISTED[(page - 1) * per_page:page * per_page], headers=headers)
+    return handler
+
+def make_collector(tmp_path, handler, scheduler=None, cls=GitHubCollector):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 600})
+    snapshots = RepoSnapshotCache(str(tmp_path / "cache.db"), 3600)
+    return cls(token="test-token", client=client, cache=cache, snapshots=snapshots,
+               scheduler=scheduler or RateLimitScheduler([], pace_below=0))
+
+def test_pagination_follows_next_links(tmp_path):
+    seen = []
+    collector = make_collector(tmp_path, listing_handler(seen))
+    repos = asyncio.run(collector.get_repos("octocat"))
+
+    assert [r.name for r in repos] == [item["name"] for item in LISTED]
+    assert [r.url.params.get("page") for r in seen] == [None, "2", "3"]
+    assert all(r.url.params["sort"] == "updated" and r.url.params["per_page"] == "100" for r in seen)
+    # Listing payloads are projected as they arrive
+    assert isinstance(repos[0], Repo)
+
+def test_repo_max_count_stops_paging(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "repo_max_count", 120)
+    seen = []
+    collector = make_collector(tmp_path, listing_handler(seen))
+    repos = asyncio.run(collector.get_repos("octocat"))
+    assert len(repos) == 120
+    assert len(seen) == 2
+
+def test_rank_strategies_put_forks_last():
+    now = time.time()
+
+    def stamp(days_ago):
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - days_ago * 86400))
+
+    repos = [
+        Repo(name="old-hit", fork=False, stargazers_count=500, pushed_at=stamp(2000)),
+        Repo(name="fresh", fork=False, stargazers_count=3, pushed_at=stamp(1)),
+        Repo(name="popular-fork", fork=True, stargazers_count=10_000, pushed_at=stamp(1)),
+        Repo(name="steady", fork=False, stargazers_count=80, pushed_at=stamp(30)),
+    ]
+    names = lambda strategy, k=4: [r.name for r in rank_repos(repos, k, strategy)]
+
+    assert names("updated") == ["old-hit", "fresh", "popular-fork", "steady"]
+    assert names("stars") == ["old-hit", "steady", "fresh", "popular-fork"]
+    assert names("recent") == ["fresh", "steady", "old-hit", "popular-fork"]
+    # Stars decay with age, so the abandoned hit drops below current work
+    assert names("stars_recent") == ["steady", "fresh", "old-hit", "popular-fork"]
+    assert names("stars_recent", k=2) == ["steady", "fresh"]
+
+def observe_budget(scheduler, resource, remaining):
+    async def run():
+        state = await scheduler.acquire(resource, extra_token="test-token")
+        request = httpx.Request("GET", "https://api.github.com/rate_limit")
+        scheduler.observe(state, httpx.Response(200, request=request, headers={
+            "X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(time.time() + 3600)}))
+    asyncio.run(run())
+
+def test_detail_budget_shrinks_with_the_remaining_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "commit_history_max", 1000)
+    scheduler = RateLimitScheduler([], pace_below=0)
+    collector = make_collector(tmp_path, lambda request: httpx.Response(200), scheduler)
+    cost = collector.detail_cost()
+    assert cost == 15
+
+    # Unknown budget: no reason to shrink yet
+    assert collector.detail_budget(5) == 5
+    observe_budget(scheduler, "core", 5000)
+    assert collector.detail_budget(5) == 5
+    observe_budget(scheduler, "core", 3 * 2 * cost)
+    assert collector.detail_budget(5) == 3
+    # Always at least one detailed repo
+    observe_budget(scheduler, "core", 1)
+    assert collector.detail_budget(5) == 1
+
+def test_graphql_details_are_budgeted_against_graphql_points(tmp_path):
+    with open(os.path.join(FIXTURES, "graphql_profile.json"), "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    with open(os.path.join(FIXTURES, "graphql_details.json"), "r", encoding="utf-8") as f:
+        details = json.load(f)
+    detail_queries = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        headers = {"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": str(time.time() + 3600)}
+        if body["query"].lstrip().startswith("query Details"):
+            detail_queries.append(body["variables"])
+            return httpx.Response(200, json=details, headers=headers)
+        return httpx.Response(200, json=profile, headers=headers)
+
+    scheduler = RateLimitScheduler([], pace_below=0)
+    # Plenty of REST budget must not hide a nearly spent GraphQL budget
+    observe_budget(scheduler, "core", 5000)
+    collector = make_collector(tmp_path, handler, scheduler, cls=GraphQLCollector)
+    raw = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+
+    assert [len(v) - 1 for v in detail_queries] == [1]
+    assert len(raw.repo_details) == 1
+
+def rest_profile_handler(seen, heads):
+    """REST profiles with a repo per entry of heads[login], whose default-branch heads are read on every request."""
+    stamp = "2024-05-01T00:00:00Z"
+
+    def handler(request):
+        path = request.url.path.strip("/")
+        seen.append((path, dict(request.url.params)))
+        parts = path.split("/")
+        if parts[0] == "users":
+            repos = heads[parts[1]]
+            if len(parts) == 2:
+                return httpx.Response(200, json={"login": parts[1], "public_repos": len(repos)})
+            return httpx.Response(200, json=[{"name": name, "fork": False, "stargazers_count": 5, "pushed_at": stamp,
+                                              "updated_at": stamp, "default_branch": "main", "language": "Python"}
+                                             for name in sorted(repos)])
+        kind = parts[3] if len(parts) > 3 else ""
+        if kind == "commits":
+            return httpx.Response(200, json=[{"sha": heads[parts[1]][parts[2]],
+                                              "commit": {"message": "Ship it", "author": {"date": stamp}}}])
+        if kind == "git":
+            return httpx.Response(200, json={"tree": [{"path": "README.md", "type": "blob"}], "truncated": False})
+        if kind == "languages":
+            return httpx.Response(200, json={"Python": 1000})
+        return httpx.Response(200, json=[])
+    return handler
+
+def detailed(seen):
+    return sorted(path.split("/")[2] for path, _ in seen if path.endswith("/languages"))
+
+def test_rest_reanalysis_refetches_only_repos_whose_head_moved(tmp_path):
+    seen, heads = [], {"octocat": {"api": "a1", "cli": "c1"}}
+    client = httpx.AsyncClient(transport=httpx.MockTransport(rest_profile_handler(seen, heads)))
+    # No response caching, so every collection sees the current heads
+    collector = GitHubCollector(token="test-token", client=client,
+                                cache=ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 0}),
+                                snapshots=RepoSnapshotCache(str(tmp_path / "cache.db"), 3600),
+                                scheduler=RateLimitScheduler([], pace_below=0))
+
+    first = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+    assert detailed(seen) == ["api", "cli"] and set(first.repo_details) == {"api", "cli"}
+
+    # Nothing changed: one head lookup per repo instead of a full detail fetch
+    seen.clear()
+    second = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+    assert detailed(seen) == []
+    assert sorted(p for p, params in seen if params.get("per_page") == "1") == [
+        "repos/octocat/api/commits", "repos/octocat/cli/commits"]
+    assert set(second.repo_features) == {"api", "cli"} and second.repo_details == {}
+
+    # A new head commit with the same listing timestamps still invalidates the snapshot
+    seen.clear()
+    heads["octocat"]["cli"] = "c2"
+    third = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+    assert detailed(seen) == ["cli"]
+    assert set(third.repo_features) == {"api"} and set(third.repo_details) == {"cli"}
+    assert collector.snapshots.stats == {"reused": 3, "refreshed": 3}
+
+def test_reanalysis_with_unchanged_signals_skips_the_llm(tmp_path, monkeypatch):
+    seen, llm_calls = [], []
+    heads = {"octocat": {"api": "a1", "cli": "c1"}, "other": {"tool": "t1"}}
+    github = httpx.AsyncClient(transport=httpx.MockTransport(rest_profile_handler(seen, heads)))
+    collector = GitHubCollector(token="test-token", client=github,
+                                cache=ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 0}),
+                                snapshots=RepoSnapshotCache(str(tmp_path / "cache.db"), 3600),
+                                scheduler=RateLimitScheduler([], pace_below=0))
+
+    def chat(request):
+        llm_calls.append(request)
+        content = json.dumps({"executive_summary": "Ships services.", "improvement_roadmap": {}})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    llm = httpx.AsyncClient(transport=httpx.MockTransport(chat))
+    engine = AIReasoningEngine(cache=LLMCache(str(tmp_path / "llm.db"), 60, 100_000))
+    engine.api_key = "test-key"
+    store = ReportStore(str(tmp_path / "reports.db"))
+    # Weaker Python profiles already stored, so octocat is ranked (and shortlisted) from the start
+    breakdown = {"consistency": 1, "depth": 1, "clarity": 1, "focus": 1, "production": 1}
+    for i in range(4):
+        store.save_report(f"seed{i}", "h", {"overall_score": "5/50", "recruiter_decision": "Not Ready",
+                                            "signal_breakdown": breakdown, "primary_language": "Python"})
+    monkeypatch.setattr(ai_reasoning, "get_client", lambda: llm)
+    monkeypatch.setattr(pipeline, "AIReasoningEngine", lambda: engine)
+    monkeypatch.setattr(pipeline, "get_report_store", lambda: store)
+    monkeypatch.setattr(settings, "report_cache_ttl", 0)
+
+    first = asyncio.run(pipeline.analyze_shared(collector, "octocat"))
+    # Another Python profile joins the stored cohort in between
+    asyncio.run(pipeline.analyze_shared(collector, "other"))
+    second = asyncio.run(pipeline.analyze_shared(collector, "octocat"))
+
+    # The re-analysis scored snapshot rows, found the same signals and reused the sections
+    assert collector.snapshots.stats["reused"] == 2
+    assert len(llm_calls) == 2
+    assert (first["cohort"]["size"], second["cohort"]["size"]) == (4, 6)
+    assert first["benchmark_position"] != second["benchmark_position"]
+    assert second["signal_breakdown"] == first["signal_breakdown"]
+    assert second["executive_summary"] == "Ships services."
+    assert len(store.list_reports("octocat")) == 2
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import random
+import sys
+
+import httpx
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache import RepoSnapshotCache, ResponseCache
+from app.collector import GitHubCollector
+from app.commit_stats import EXACT_LIMIT, CommitAggregate, MessageSketch
+from app.config import settings
+from app.models import Commit
+
+def commit(sha, message, date=None):
+    # REST-shaped, as the commits endpoint returns it
+    details = {"message": message}
+    if date:
+        details["author"] = {"date": date}
+    return {"sha": sha, "commit": details}
+
+def test_sketch_is_exact_then_approximate():
+    sketch = MessageSketch()
+    for i in range(EXACT_LIMIT):
+        sketch.add(f"fix #{i % 100}")
+    assert sketch.estimate() == 100
+    assert "exact" in sketch.as_dict()
+
+    for i in range(20_000):
+        sketch.add(f"feature {i}")
+    assert "registers" in sketch.as_dict()
+    assert abs(sketch.estimate() - 20_100) / 20_100 < 0.05
+
+    restored = MessageSketch.from_dict(sketch.as_dict())
+    assert restored.estimate() == sketch.estimate()
+
+def test_merged_sketches_count_the_union():
+    rng = random.Random(7)
+    messages = [f"msg {rng.randint(0, 5000)}" for _ in range(8000)]
+    left, right, whole = MessageSketch(), MessageSketch(), MessageSketch()
+    for i, message in enumerate(messages):
+        (left if i % 2 else right).add(message)
+        whole.add(message)
+    left.merge(right)
+    assert left.estimate() == whole.estimate()
+    assert abs(whole.estimate() - len(set(messages))) / len(set(messages)) < 0.05
+
+def test_weeks_and_streaks():
+    aggregate = CommitAggregate()
+    # Newest first, as the API returns them: three consecutive weeks, a gap, then one more
+    for sha, date in (("c5", "2024-03-20T10:00:00Z"), ("c4", "2024-03-13T10:00:00Z"),
+                      ("c3", "2024-03-11T09:00:00Z"), ("c2", "2024-03-06T10:00:00Z"),
+                      ("c1", "2024-02-01T10:00:00Z")):
+        aggregate.add(Commit.from_api(commit(sha, f"work {sha}", date)))
+    assert aggregate.head_sha == "c5"
+    assert aggregate.commits == 5
+    assert aggregate.active_weeks == 4
+    assert aggregate.longest_streak() == 3
+
+    other = CommitAggregate.from_dict(aggregate.as_dict())
+    other.merge(aggregate)
+    assert other.commits == 10 and other.active_weeks == 4
+    assert other.messages.estimate() == 5
+
+def test_collector_streams_commit_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "commit_history_max", 250)
+    history = [commit(f"sha{i}", "wip" if i % 2 else f"change {i}", f"2024-01-{1 + i % 28:02d}T00:00:00Z")
+               for i in range(400)]
+    pages = []
+
+    def handler(request):
+        if request.url.path.endswith("/empty/commits"):
+            return httpx.Response(409, json={"message": "Git Repository is empty."})
+        page = int(request.url.params.get("page", "1"))
+        per_page = int(request.url.params["per_page"])
+        pages.append(page)
+        headers = {}
+        if page * per_page < len(history):
+            headers["Link"] = f'<{request.url.copy_set_param("page", str(page + 1))}>; rel="next"'
+        return httpx.Response(200, json=history[(page - 1) * per_page:page * per_page], headers=headers)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 60})
+    snapshots = RepoSnapshotCache(str(tmp_path / "cache.db"), 3600)
+    collector = GitHubCollector(token="test-token", client=client, cache=cache, snapshots=snapshots)
+
+    async def run():
+        return [await collector.get_commit_stats("octocat", repo) for repo in ("hello", "empty")]
+
+    stats, empty = asyncio.run(run())
+    # COMMIT_HISTORY_MAX stops the stream before the last page
+    assert pages == [1, 2, 3]
+    assert stats["commits"] == 250
+    assert stats["head_sha"] == "sha0"
+    aggregate = CommitAggregate.from_dict(stats)
+    assert aggregate.messages.estimate() == 126
+    assert empty["commits"] == 0 and empty["head_sha"] is None
@@ -0,0 +1,26 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.engine import ScoringEngine
+from app.features import RepoFeatures
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+with open(os.path.join(FIXTURES, "scoring_regression.json"), "r", encoding="utf-8") as f:
+    REGRESSION_CASES = json.load(f)
+
+@pytest.mark.parametrize("case", REGRESSION_CASES, ids=lambda c: (c["raw_data"].get("user") or {}).get("login", "empty"))
+def test_matches_recorded_results(case):
+    assert ScoringEngine(case["raw_data"]).calculate_metrics() == case["expected"]
+
+def test_precomputed_features_skip_raw_details():
+    case = REGRESSION_CASES[-2]
+    features = RepoFeatures.from_details(case["raw_data"]["repo_details"])
+    raw = {**case["raw_data"], "repo_details": {}}
+    assert ScoringEngine(raw, features=features).calculate_metrics() == case["expected"]
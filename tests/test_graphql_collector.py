@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache import RepoSnapshotCache, ResponseCache
+from app.engine import ScoringEngine
+from app.graphql_collector import GraphQLCollector
+from app.models import ContentEntry
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def fixture_handler(requests_seen):
+    def handler(request):
+        body = json.loads(request.content)
+        requests_seen.append(body)
+        if body["query"].lstrip().startswith("query Details"):
+            return httpx.Response(200, json=load_fixture("graphql_details.json"))
+        return httpx.Response(200, json=load_fixture("graphql_profile.json"))
+    return handler
+
+def make_collector(tmp_path, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 600})
+    snapshots = RepoSnapshotCache(str(tmp_path / "cache.db"), 3600)
+    return GraphQLCollector(token="test-token", client=client, cache=cache, snapshots=snapshots)
+
+def test_collect_profile_matches_rest_shape(tmp_path):
+    requests_seen = []
+    collector = make_collector(tmp_path, fixture_handler(requests_seen))
+    raw = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+
+    # One page of repos, then one query for the details of both selected repos
+    assert len(requests_seen) == 2
+    assert requests_seen[0]["variables"] == {"login": "octocat", "cursor": None}
+    assert requests_seen[1]["variables"]["owner"] == "octocat"
+    assert {requests_seen[1]["variables"]["n0"], requests_seen[1]["variables"]["n1"]} == {"Hello-World", "Spoon-Knife"}
+
+    assert raw.user.login == "octocat"
+    assert raw.user.public_repos == 3
+    assert [r.name for r in raw.repos] == ["Hello-World", "Spoon-Knife", "linguist"]
+    assert raw.repos[2].fork is True
+    assert set(raw.repo_details) == {"Hello-World", "Spoon-Knife"}
+
+    details = raw.repo_details["Hello-World"]
+    assert details.languages == {"Python": 9000, "Shell": 800, "Dockerfile": 200}
+    assert ContentEntry(name="src", type="dir") in details.contents
+    assert ContentEntry(name="README.md", type="file") in details.contents
+    assert details.commits[0].message == "Add CI workflow"
+    assert len(details.pulls) == 1
+    assert len(details.issues) == 3
+    assert details.issues[0].is_pull_request
+    assert details.releases[0].tag_name == "v1.0.0"
+
+    # The scorer consumes the translated data unchanged
+    results = ScoringEngine(raw).calculate_metrics()
+    assert results["breakdown"]["production"] == 10
+    # Both detailed repos have a README; clarity is averaged over detailed repos only
+    assert results["breakdown"]["clarity"] == 5
+
+def test_collect_profile_uses_cache(tmp_path):
+    calls = []
+    collector = make_collector(tmp_path, fixture_handler(calls))
+    first = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+    second = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+
+    assert len(calls) == 2
+    assert first.user == second.user and first.repos == second.repos
+    # Unchanged repos come back as snapshot feature rows and score identically
+    assert set(second.repo_features) == set(first.repo_details)
+    assert ScoringEngine(first).calculate_metrics() == ScoringEngine(second).calculate_metrics()
+
+def test_reanalysis_refetches_only_changed_repos(tmp_path):
+    requests_seen = []
+    profile = load_fixture("graphql_profile.json")
+
+    nodes = {node["name"]: node for node in load_fixture("graphql_details.json")["data"].values()}
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests_seen.append(body)
+        if body["query"].lstrip().startswith("query Details"):
+            names = [v for k, v in body["variables"].items() if k != "owner"]
+            return httpx.Response(200, json={"data": {f"r{i}": nodes[n] for i, n in enumerate(names)}})
+        return httpx.Response(200, json=profile)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    # No response caching, so every collection sees the current listing
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 0})
+    snapshots = RepoSnapshotCache(str(tmp_path / "cache.db"), 3600)
+    collector = GraphQLCollector(token="test-token", client=client, cache=cache, snapshots=snapshots)
+
+    asyncio.run(collector.collect_profile("octocat", max_repos=2))
+    node = next(n for n in profile["data"]["user"]["repositories"]["nodes"] if n["name"] == "Spoon-Knife")
+    node["pushedAt"] = "2030-01-01T00:00:00Z"
+    raw = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+
+    details_queries = [b for b in requests_seen if b["query"].lstrip().startswith("query Details")]
+    assert len(details_queries) == 2
+    assert details_queries[1]["variables"] == {"owner": "octocat", "n0": "Spoon-Knife"}
+    assert set(raw.repo_details) == {"Spoon-Knife"}
+    assert set(raw.repo_features) == {"Hello-World"}
+    assert snapshots.stats == {"reused": 1, "refreshed": 3}
+
+def test_missing_user_raises_404(tmp_path):
+    def handler(request):
+        return httpx.Response(200, json={
+            "data": {"user": None},
+            "errors": [{"type": "NOT_FOUND", "path": ["user"],
+                        "message": "Could not resolve to a User with the login of 'ghost-x'."}]
+        })
+
+    collector = make_collector(tmp_path, handler)
+    with pytest.raises(httpx.HTTPStatusError) as exc_info:
+        asyncio.run(collector.collect_profile("ghost-x"))
+    assert exc_info.value.response.status_code == 404
+
+def test_follows_repository_cursor(tmp_path):
+    requests_seen = []
+    first_page = load_fixture("graphql_profile.json")
+    connection = first_page["data"]["user"]["repositories"]
+    second_page = json.loads(json.dumps(first_page))
+    connection["pageInfo"] = {"hasNextPage": True, "endCursor": "page-2"}
+    connection["nodes"] = connection["nodes"][:2]
+    second_page["data"]["user"]["repositories"]["nodes"] = second_page["data"]["user"]["repositories"]["nodes"][2:]
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests_seen.append(body)
+        if body["query"].lstrip().startswith("query Details"):
+            return httpx.Response(200, json=load_fixture("graphql_details.json"))
+        return httpx.Response(200, json=second_page if body["variables"]["cursor"] else first_page)
+
+    collector = make_collector(tmp_path, handler)
+    raw = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+
+    assert requests_seen[1]["variables"]["cursor"] == "page-2"
+    assert [r.name for r in raw.repos] == ["Hello-World", "Spoon-Knife", "linguist"]
+
+def test_a_moved_head_in_the_listing_invalidates_the_snapshot(tmp_path):
+    requests_seen = []
+    profile = load_fixture("graphql_profile.json")
+    nodes = {node["name"]: node for node in load_fixture("graphql_details.json")["data"].values()}
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests_seen.append(body)
+        if body["query"].lstrip().startswith("query Details"):
+            names = [v for k, v in body["variables"].items() if k != "owner"]
+            return httpx.Response(200, json={"data": {f"r{i}": nodes[n] for i, n in enumerate(names)}})
+        return httpx.Response(200, json=profile)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 0})
+    snapshots = RepoSnapshotCache(str(tmp_path / "cache.db"), 3600)
+    collector = GraphQLCollector(token="test-token", client=client, cache=cache, snapshots=snapshots)
+
+    asyncio.run(collector.collect_profile("octocat", max_repos=2))
+    node = next(n for n in profile["data"]["user"]["repositories"]["nodes"] if n["name"] == "Hello-World")
+    # Same timestamps, but the default branch points at a new commit
+    node["defaultBranchRef"] = {"target": {"oid": "0" * 40}}
+    raw = asyncio.run(collector.collect_profile("octocat", max_repos=2))
+
+    details_queries = [b for b in requests_seen if b["query"].lstrip().startswith("query Details")]
+    assert details_queries[1]["variables"] == {"owner": "octocat", "n0": "Hello-World"}
+    assert set(raw.repo_details) == {"Hello-World"}
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+
+import httpx
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import jobs
+from app.jobs import JobQueue
+from app.metrics import layer_span, start_request_timings
+from app.pipeline import analysis_key
+from app.store import ReportStore
+
+REPORT = {"overall_score": "31/50", "recruiter_decision": "Borderline"}
+
+def test_store_lists_newest_first_and_finds_latest(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.db"))
+    first = store.save_report("Octocat", "h1", REPORT)
+    second = store.save_report("octocat", "h2", {**REPORT, "overall_score": "40/50"})
+    store.save_report("someone", "h1", REPORT)
+
+    listed = store.list_reports("OCTOCAT")
+    assert [r["id"] for r in listed] == [second, first]
+    assert listed[0]["total_score"] == 40
+    assert store.latest_report_id("octocat", "h1") == first
+    assert store.get_report(second)["report"]["overall_score"] == "40/50"
+    assert len(store.list_reports(limit=2)) == 2
+
+def test_jobs_run_in_background_and_record_outcomes(tmp_path, monkeypatch):
+    store = ReportStore(str(tmp_path / "reports.db"))
+
+    async def fake_analyze(collector, username, resume_text=""):
+        await asyncio.sleep(0.01)
+        if username == "ghost":
+            request = httpx.Request("GET", "https://api.github.com/users/ghost")
+            raise httpx.HTTPStatusError("not found", request=request, response=httpx.Response(404, request=request))
+        return store.save_report(*analysis_key(username, resume_text), REPORT)
+
+    monkeypatch.setattr(jobs, "analyze_shared", fake_analyze)
+    monkeypatch.setattr(jobs, "create_collector", lambda **kwargs: None)
+
+    async def run():
+        queue = JobQueue(store, workers=2, max_pending=10)
+        ok = queue.submit("octocat")
+        missing = queue.submit("ghost")
+        assert store.get_job(ok["id"])["status"] == "queued"
+        while store.get_job(ok["id"])["status"] != "done":
+            await queue.wait(ok["id"], timeout=1)
+        while store.get_job(missing["id"])["status"] != "failed":
+            await queue.wait(missing["id"], timeout=1)
+        await queue.stop()
+        return store.get_job(ok["id"]), store.get_job(missing["id"])
+
+    done, failed = asyncio.run(run())
+    assert store.get_report(done["report_id"])["report"] == REPORT
+    assert failed["status_code"] == 404
+    assert "ghost" in failed["error"]
+
+def test_unfinished_jobs_fail_after_restart(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.db"))
+    job = store.create_job("octocat")
+    assert store.fail_interrupted_jobs() == 1
+    assert store.get_job(job["id"])["status"] == "failed"
+
+def test_jobs_do_not_record_timings_into_the_submitting_request(tmp_path, monkeypatch):
+    store = ReportStore(str(tmp_path / "reports.db"))
+
+    async def fake_analyze(collector, username, resume_text=""):
+        with layer_span("collect"):
+            await asyncio.sleep(0)
+        return store.save_report(*analysis_key(username, resume_text), REPORT)
+
+    monkeypatch.setattr(jobs, "analyze_shared", fake_analyze)
+    monkeypatch.setattr(jobs, "create_collector", lambda **kwargs: None)
+
+    async def run():
+        queue = JobQueue(store, workers=1, max_pending=30)
+        # The first submit starts the workers from inside this "request"
+        timings = start_request_timings()
+        submitted = [queue.submit(f"user{i}") for i in range(20)]
+        while store.get_job(submitted[-1]["id"])["status"] != "done":
+            await queue.wait(submitted[-1]["id"], timeout=1)
+        await queue.stop()
+        return timings
+
+    assert asyncio.run(run()) == []
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache import LLMCache
+from app import ai_reasoning
+from app.ai_reasoning import AIReasoningEngine, count_tokens
+
+SIGNALS = {
+    "total_score": 31,
+    "breakdown": {"consistency": 5, "depth": 5, "clarity": 5, "focus": 6, "production": 10},
+    "red_flags": {"critical": [], "moderate": [], "minor": []},
+    "decision": "Borderline",
+}
+
+def test_cache_round_trip_expiry_and_eviction(tmp_path):
+    cache = LLMCache(str(tmp_path / "c.db"), ttl=60, max_bytes=10_000)
+    cache.put("a", {"executive_summary": "ok"})
+    assert cache.get("a") == {"executive_summary": "ok"}
+    assert cache.get("missing") is None
+
+    expired = LLMCache(str(tmp_path / "c.db"), ttl=0, max_bytes=10_000)
+    assert expired.get("a") is None
+    assert expired.stats["expired"] == 1
+
+    small = LLMCache(str(tmp_path / "small.db"), ttl=60, max_bytes=100)
+    for i in range(5):
+        small.put(str(i), {"executive_summary": "x" * 30})
+    assert small.get("0") is None
+    assert small.get("4") is not None
+    assert small.summary()["size_bytes"] <= 100
+
+def test_key_is_canonical_and_prompt_is_compact(tmp_path):
+    engine = AIReasoningEngine(cache=LLMCache(str(tmp_path / "c.db"), 60, 10_000))
+    reordered = dict(reversed(list(SIGNALS.items())))
+    assert engine.cache_key(SIGNALS) == engine.cache_key(reordered)
+    assert engine.cache_key(SIGNALS) != engine.cache_key(SIGNALS, "Senior engineer")
+
+    prompt = engine.build_prompt(SIGNALS)
+    assert '"breakdown":{"clarity":5,' in prompt
+    assert count_tokens(prompt, engine.model) > 0
+
+def test_cached_sections_skip_the_provider(tmp_path):
+    engine = AIReasoningEngine(cache=LLMCache(str(tmp_path / "c.db"), 60, 10_000))
+    engine.api_key = "test-key"
+    engine.url = "http://127.0.0.1:9/unreachable"
+    sections = {"executive_summary": "Cached", "improvement_roadmap": {}}
+    engine.cache.put(engine.cache_key(SIGNALS, "cv"), sections)
+
+    assert asyncio.run(engine.generate_report_sections(SIGNALS, "cv")) == sections
+    # A different resume misses the cache and hits the (unreachable) provider
+    assert "error" in asyncio.run(engine.generate_report_sections(SIGNALS, "other cv"))
+
+def test_a_failed_encoding_load_is_not_retried(monkeypatch):
+    attempts = []
+
+    def unavailable(name):
+        attempts.append(name)
+        raise OSError("no network")
+
+    monkeypatch.setattr(ai_reasoning, "tiktoken", SimpleNamespace(encoding_for_model=unavailable, get_encoding=unavailable))
+    monkeypatch.setattr(ai_reasoning, "_encodings", {})
+    assert count_tokens("x" * 40, "some-model") == 10
+    assert count_tokens("x" * 40, "some-model") == 10
+    assert attempts == ["some-model"]
+
+def test_prompt_savings_are_logged_at_info_and_labelled_as_estimates(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(ai_reasoning, "tiktoken", None)
+    engine = AIReasoningEngine(cache=LLMCache(str(tmp_path / "c.db"), 60, 10_000))
+
+    caplog.set_level(logging.INFO, logger="app.ai_reasoning")
+    prompt = engine.build_prompt(SIGNALS)
+    [record] = [r for r in caplog.records if r.name == "app.ai_reasoning"]
+    assert record.levelno == logging.INFO
+    assert f"LLM prompt: {count_tokens(prompt, engine.model)} tokens" in record.message
+    assert "% saved; estimated at ~4 characters/token" in record.message
+
+    # Nothing is counted when the logger is quieter than INFO
+    counted = []
+    monkeypatch.setattr(ai_reasoning, "count_tokens", lambda text, model: counted.append(text) or 1)
+    caplog.set_level(logging.WARNING, logger="app.ai_reasoning")
+    engine.build_prompt(SIGNALS)
+    assert counted == []
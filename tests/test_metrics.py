@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.metrics import LAYER_SECONDS, layer_span, observe_upstream, server_timing_header, start_request_timings
+
+def _observed(layer: str) -> float:
+    return LAYER_SECONDS.labels(layer=layer)._sum.get()
+
+def test_spans_feed_histograms_and_request_timings():
+    async def request():
+        timings = start_request_timings()
+        with layer_span("collect"):
+            await asyncio.sleep(0.01)
+            observe_upstream("github", "user", 200, 0.004)
+            observe_upstream("github", "repos", 200, 0.006)
+        return timings
+
+    before = _observed("collect")
+    timings = asyncio.run(request())
+    assert _observed("collect") > before
+    assert [name for name, _ in timings] == ["github", "github", "collect"]
+
+    header = server_timing_header(timings)
+    assert header.startswith('github;dur=10.0;desc="2 calls, summed", collect;dur=')
+
+def test_spans_outside_a_request_are_not_collected():
+    async def background():
+        with layer_span("score"):
+            pass
+        return start_request_timings()
+
+    # A fresh context per asyncio.run, so nothing leaks between requests
+    assert asyncio.run(background()) == []
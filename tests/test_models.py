@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache import RepoSnapshotCache, ResponseCache
+from app.collector import GitHubCollector
+from app.engine import ScoringEngine
+from app.models import Commit, Issue, RawProfile, User, project_payload
+
+REST_FIXTURES = os.path.join(os.path.dirname(__file__), "..", "bench", "fixtures", "rest")
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_rest(name):
+    with open(os.path.join(REST_FIXTURES, f"{name}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def test_payloads_are_projected_to_the_fields_we_read():
+    user = project_payload("user", load_rest("user"))
+    assert set(user) == set(User.__slots__)
+
+    commit = Commit.from_api(load_rest("commits")[0])
+    assert commit.sha and commit.message and commit.date
+    # The compact form reads back unchanged
+    assert Commit.from_dict(commit.as_dict()) == commit
+
+    issues = load_rest("issues")
+    assert [Issue.from_api(item).is_pull_request for item in issues] == ["pull_request" in item for item in issues]
+
+    for kind in ("repos", "commits", "pulls", "issues", "releases"):
+        body = load_rest(kind)
+        compact = project_payload(kind, body)
+        assert len(compact) == len(body)
+        assert len(json.dumps(compact)) * 10 < len(json.dumps(body))
+
+def test_raw_profile_round_trips_through_its_dict_form():
+    with open(os.path.join(FIXTURES, "scoring_regression.json"), "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    for case in cases:
+        profile = RawProfile.from_dict(case["raw_data"])
+        restored = RawProfile.from_dict(json.loads(json.dumps(profile.as_dict())))
+        assert ScoringEngine(restored).calculate_metrics() == case["expected"]
+
+def test_response_cache_holds_the_compact_body(tmp_path):
+    def handler(request):
+        return httpx.Response(200, json=load_rest("commits"), headers={"ETag": '"c1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 600})
+    snapshots = RepoSnapshotCache(str(tmp_path / "cache.db"), 3600)
+    collector = GitHubCollector(token="test-token", client=client, cache=cache, snapshots=snapshots)
+
+    async def run():
+        return [commit async for commit in collector.iter_commits("octocat", "hello")]
+
+    commits = asyncio.run(run())
+    cached = cache.get("repos/octocat/hello/commits", {"per_page": 100})
+    assert cached.body == [commit.as_dict() for commit in commits]
+    assert cache.summary()["size_bytes"] * 10 < len(json.dumps(load_rest("commits")))
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache import RepoSnapshotCache, ResponseCache
+from app.collector import GitHubCollector
+from app.engine import ScoringEngine
+from app.features import RepoFeatures
+from app.path_index import TreeParser
+
+TREE = [
+    {"path": "README.md", "type": "blob"},
+    {"path": "src", "type": "tree"},
+    {"path": "src/pkg", "type": "tree"},
+    {"path": "src/pkg/core", "type": "tree"},
+    {"path": "src/pkg/core/service.py", "type": "blob"},
+    {"path": "src/pkg/core/{weird} \"name\\.py", "type": "blob"},
+    {"path": "services/api/tests/test_service.py", "type": "blob"},
+    {"path": "deploy/docker/Dockerfile", "type": "blob"},
+    {"path": ".github/workflows/ci.yml", "type": "blob"},
+    {"path": "vendor/lib", "type": "commit"},
+]
+
+def tree_body(tree=TREE, truncated=False, indent=None):
+    return json.dumps({"sha": "abc", "url": "https://example", "tree": tree, "truncated": truncated}, indent=indent)
+
+def parse(body, chunk_size, max_entries=None):
+    parser = TreeParser(max_entries)
+    for i in range(0, len(body), chunk_size):
+        if not parser.feed(body[i:i + chunk_size]):
+            break
+    return parser.close().as_dict()
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_chunk_boundaries_do_not_change_the_index(chunk_size, indent):
+    index = parse(tree_body(indent=indent), chunk_size)
+    assert index["files"] == 6
+    assert index["dirs"] == 3
+    assert index["root"] == ["README.md", "src"]
+    assert index["root_dirs"] == ["src"]
+    # Dockerfile, CI and tests are found below the root
+    assert index["has_dockerfile"] and index["has_ci"] and index["has_tests"]
+    assert index["depth_histogram"][4] == 3
+    assert index["depth_p90"] == 4
+    assert not index["truncated"]
+
+def test_truncated_trees_are_flagged():
+    assert parse(tree_body(truncated=True), 5)["truncated"]
+    # A body cut off inside the tree array keeps what arrived
+    body = tree_body()
+    cut = parse(body[:body.index("deploy")], 7)
+    assert cut["truncated"]
+    assert cut["files"] == 4
+
+def test_max_entries_stops_reading():
+    tree = [{"path": f"src/file{i}.py", "type": "blob"} for i in range(1000)]
+    parser = TreeParser(max_entries=10)
+    body = tree_body(tree)
+    consumed = 0
+    while parser.feed(body[consumed:consumed + 64]):
+        consumed += 64
+    index = parser.close()
+    assert index.files == 10 and index.truncated
+    assert consumed < len(body) // 10
+
+def test_tree_signals_feed_depth_and_production():
+    row = RepoFeatures.extract({"tree": parse(tree_body(), 1 << 20)})
+    assert row["depth"] == 4
+    assert row["has_readme"] and row["structured"]
+    assert row["has_dockerfile"] and row["has_ci"] and row["has_tests"]
+
+def test_tree_and_contents_count_the_same_root_entries():
+    # Deep trees must not inflate the count the complexity thresholds were set for
+    tree = [{"path": "README.md", "type": "blob"}, {"path": "src", "type": "tree"}]
+    tree += [{"path": f"src/module{i}.py", "type": "blob"} for i in range(200)]
+    contents = [{"name": "README.md", "type": "file"}, {"name": "src", "type": "dir"}]
+    from_tree = RepoFeatures.extract({"tree": parse(tree_body(tree), 1 << 20)})
+    from_contents = RepoFeatures.extract({"contents": contents})
+    assert from_tree["file_count"] == from_contents["file_count"] == 2
+    assert ScoringEngine({"user": {}, "repos": [], "repo_details": {"r": {"tree": parse(tree_body(tree), 1 << 20)}}}
+                         ).calculate_metrics()["complexity_class"] == "Toy"
+
+def test_collector_streams_the_recursive_tree(tmp_path):
+    seen = []
+    body = tree_body().encode()
+
+    async def chunks():
+        for i in range(0, len(body), 13):
+            yield body[i:i + 13]
+
+    def handler(request):
+        seen.append(request)
+        if request.url.path.endswith("/empty/git/trees/main"):
+            return httpx.Response(409, json={"message": "Git Repository is empty."})
+        if request.headers.get("If-None-Match") == '"t1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=chunks(), headers={"ETag": '"t1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    # TTL 0: every lookup revalidates, so the second fetch is a conditional request
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 0})
+    snapshots = RepoSnapshotCache(str(tmp_path / "cache.db"), 3600)
+    collector = GitHubCollector(token="test-token", client=client, cache=cache, snapshots=snapshots)
+
+    async def run():
+        return [await collector.get_tree("octocat", repo, "main") for repo in ("hello", "empty", "hello")]
+
+    index, empty, revalidated = asyncio.run(run())
+    assert seen[0].url.path == "/repos/octocat/hello/git/trees/main"
+    assert seen[0].url.params["recursive"] == "1"
+    assert index["files"] == 6 and index["has_ci"]
+    assert empty["files"] == 0 and not empty["truncated"]
+    # Only the summary is cached; a 304 answers with it
+    assert revalidated == index
+    assert cache.stats["revalidated"] == 1
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache import RepoSnapshotCache, ResponseCache
+from app.collector import GitHubCollector
+from app.rate_limit import RateLimitScheduler, RateLimitExceeded
+
+def response(status=200, **headers):
+    return httpx.Response(status, headers=headers, request=httpx.Request("GET", "https://api.github.com/x"))
+
+def test_rotates_to_token_with_most_budget():
+    scheduler = RateLimitScheduler(["a", "b"], pace_below=0)
+
+    async def run():
+        first = await scheduler.acquire()
+        scheduler.observe(first, response(**{"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(time.time() + 60)}))
+        second = await scheduler.acquire()
+        scheduler.observe(second, response(**{"X-RateLimit-Remaining": "900", "X-RateLimit-Reset": str(time.time() + 60)}))
+        return first, second, await scheduler.acquire()
+
+    first, second, third = asyncio.run(run())
+    assert first.token != second.token
+    assert third.token == second.token
+
+def test_exhausted_pool_queues_then_fails_past_max_wait():
+    scheduler = RateLimitScheduler(["a"], pace_below=0)
+
+    async def run():
+        state = await scheduler.acquire()
+        limited = scheduler.observe(state, response(403, **{"X-RateLimit-Remaining": "0",
+                                                             "X-RateLimit-Reset": str(time.time() + 0.2)}))
+        assert limited
+        started = time.time()
+        await scheduler.acquire(max_wait=5)
+        waited = time.time() - started
+
+        scheduler.observe(state, response(403, **{"X-RateLimit-Remaining": "0",
+                                                  "X-RateLimit-Reset": str(time.time() + 600)}))
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.acquire(max_wait=1)
+        return waited
+
+    assert asyncio.run(run()) >= 0.15
+
+def test_extra_token_only_offered_to_its_request():
+    scheduler = RateLimitScheduler(["pool"], pace_below=0)
+
+    async def run():
+        pool = await scheduler.acquire()
+        scheduler.observe(pool, response(429, **{"Retry-After": "600"}))
+        byot = await scheduler.acquire(extra_token="mine", max_wait=0)
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.acquire(max_wait=0)
+        return byot
+
+    assert asyncio.run(run()).token == "mine"
+
+def test_without_any_token_calls_share_the_unauthenticated_budget(tmp_path):
+    scheduler = RateLimitScheduler([""], pace_below=0)
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"login": "octocat"}, headers={
+            "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 600)})
+
+    collector = GitHubCollector(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+                                cache=ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"default": 0}),
+                                snapshots=RepoSnapshotCache(str(tmp_path / "cache.db"), 3600),
+                                scheduler=scheduler, max_wait=0)
+
+    async def run():
+        await collector.get_user("octocat")
+        # The anonymous budget is spent: a clear rate-limit error, not a crash on an empty pool
+        with pytest.raises(RateLimitExceeded):
+            await collector.get_user("octocat")
+
+    asyncio.run(run())
+    assert len(seen) == 1 and "Authorization" not in seen[0].headers
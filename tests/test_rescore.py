@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cli import main
+from app.config import settings
+from app.models import RawProfile
+from app.rescore import rescore_profiles
+from app.store import ReportStore
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_cases():
+    with open(os.path.join(FIXTURES, "scoring_regression.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def fill(store, cases):
+    """Store every case with an outdated score section and an AI section to keep."""
+    ids = []
+    for i, case in enumerate(cases):
+        stale = {"overall_score": "1/50", "recruiter_decision": "Not Ready", "signal_breakdown": {"depth": 0},
+                 "executive_summary": f"summary {i}"}
+        ids.append(store.save_report(f"user{i}", "h", stale, RawProfile.from_dict(case["raw_data"]).as_dict()))
+    return ids
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rescore_rewrites_score_sections(tmp_path, workers):
+    cases = load_cases()
+    store = ReportStore(str(tmp_path / "reports.db"), cohort_min_size=10_000)
+    ids = fill(store, cases)
+    # A report without a stored profile is left alone
+    untouched = store.save_report("legacy", "h", {"overall_score": "1/50"})
+
+    seen = []
+    stats = rescore_profiles(store, workers=workers, chunk_size=7, progress=seen.append)
+    assert stats["profiles"] == len(cases) and stats["failed"] == 0
+    assert seen[-1]["profiles"] == len(cases)
+
+    for report_id, case, i in zip(ids, cases, range(len(cases))):
+        report = store.get_report(report_id)["report"]
+        expected = case["expected"]
+        assert report["overall_score"] == f"{expected['total_score']}/50"
+        assert report["signal_breakdown"] == expected["breakdown"]
+        assert report["recruiter_decision"] == expected["decision"]
+        assert report["executive_summary"] == f"summary {i}"
+    assert store.get_report(untouched)["report"] == {"overall_score": "1/50"}
+    assert store.list_reports("user0")[0]["total_score"] == cases[0]["expected"]["total_score"]
+
+    # The cohort is rebuilt from the new scores
+    cohort = store.cohort()
+    total = cases[0]["expected"]["total_score"]
+    assert cohort.size() == sum(1 for c in cases if c["expected"]["breakdown"])
+    assert cohort.percentile("*", "total", total) is not None
+
+def test_only_the_latest_profile_per_user_is_kept(tmp_path):
+    case = load_cases()[0]
+    store = ReportStore(str(tmp_path / "reports.db"))
+    profile = RawProfile.from_dict(case["raw_data"]).as_dict()
+    store.save_report("Octocat", "h1", {"overall_score": "1/50"}, profile)
+    latest = store.save_report("octocat", "h2", {"overall_score": "1/50"}, profile)
+    assert store.count_profiles() == 1
+    assert [rows[0][0] for rows in store.iter_profiles(10)] == [latest]
+
+def test_cli_prints_throughput(tmp_path, monkeypatch, capsys):
+    store = ReportStore(str(tmp_path / "reports.db"))
+    fill(store, load_cases()[:3])
+    monkeypatch.setattr("app.cli.get_report_store", lambda: store)
+    monkeypatch.setattr(settings, "rescore_workers", 1)
+
+    assert main(["rescore", "--chunk-size", "2"]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats["profiles"] == 3 and stats["failed"] == 0
+    assert stats["per_second"] > 0
+
+def test_a_running_server_ranks_against_the_rescored_cohort(tmp_path):
+    path = str(tmp_path / "reports.db")
+    cases = load_cases()
+    server = ReportStore(path, cohort_min_size=1)
+    fill(server, cases)
+    # The stale scores are all 1/50
+    assert server.cohort().percentile("*", "total", 1) == 50
+
+    # The rescore runs in another process, with its own connection and cohort
+    rescore_profiles(ReportStore(path, cohort_min_size=1), workers=1, chunk_size=50)
+    totals = sorted(c["expected"]["total_score"] for c in cases if c["expected"]["breakdown"])
+    assert server.cohort().size() == len(totals)
+    assert server.cohort().percentile("*", "total", 1) < 50
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import httpx
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import cache as cache_module
+from app.cache import RepoSnapshotCache, ResponseCache
+from app.collector import GitHubCollector
+
+USER = {"login": "octocat", "bio": "Cat", "followers": 10}
+
+def fake_clock(monkeypatch, start=1_000_000.0):
+    clock = {"now": start}
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: clock["now"]))
+    return clock
+
+def test_entries_expire_per_endpoint_type(tmp_path, monkeypatch):
+    clock = fake_clock(monkeypatch)
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"user": 3600, "commits": 60, "default": 10})
+    cache.put("users/octocat", None, b'{"login": "octocat"}')
+    cache.put("repos/octocat/hello/commits", {"per_page": 100}, b"[]")
+    cache.put("rate_limit", None, b"{}")
+
+    clock["now"] += 120
+    assert cache.get("users/octocat").fresh
+    assert not cache.get("repos/octocat/hello/commits", {"per_page": 100}).fresh
+    assert not cache.get("rate_limit").fresh
+    assert cache.get("users/other") is None
+    assert cache.stats["hits"] == 1 and cache.stats["stale"] == 2 and cache.stats["misses"] == 1
+
+def test_stale_entries_are_revalidated_with_conditional_requests(tmp_path, monkeypatch):
+    clock = fake_clock(monkeypatch)
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=USER, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    cache = ResponseCache(str(tmp_path / "cache.db"), 1024 * 1024, {"user": 60})
+    snapshots = RepoSnapshotCache(str(tmp_path / "cache.db"), 3600)
+    collector = GitHubCollector(token="test-token", client=client, cache=cache, snapshots=snapshots)
+
+    first = asyncio.run(collector.get_user("octocat"))
+    assert "If-None-Match" not in seen[0].headers
+
+    # Fresh: answered from the cache without a request
+    assert asyncio.run(collector.get_user("octocat")) == first
+    assert len(seen) == 1
+
+    # Stale: revalidated, and the 304 is served from the cache
+    clock["now"] += 120
+    assert asyncio.run(collector.get_user("octocat")) == first
+    assert seen[1].headers["If-None-Match"] == '"v1"'
+    assert seen[1].headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert cache.stats["revalidated"] == 1
+
+    # The 304 restarted the TTL
+    asyncio.run(collector.get_user("octocat"))
+    assert len(seen) == 2
+
+def test_least_recently_used_entries_are_evicted_past_max_bytes(tmp_path, monkeypatch):
+    clock = fake_clock(monkeypatch)
+    cache = ResponseCache(str(tmp_path / "cache.db"), 250, {"default": 3600})
+    body = b"[" + b"0," * 49 + b"0]"
+    assert len(body) == 101
+
+    cache.put("a", None, body)
+    clock["now"] += 1
+    cache.put("b", None, body)
+    clock["now"] += 1
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") is not None
+    clock["now"] += 1
+    cache.put("c", None, body)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    summary = cache.summary()
+    assert summary["evictions"] == 1
+    assert summary["entries"] == 2 and summary["size_bytes"] == 202
+
+    # Replacing an entry doesn't count its old size twice
+    cache.put("c", None, body)
+    assert cache.summary()["size_bytes"] == 202
+
+    # A fresh process sees the same size
+    assert ResponseCache(str(tmp_path / "cache.db"), 250, {}).summary()["size_bytes"] == 202
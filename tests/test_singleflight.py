@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+
+# Add the project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.singleflight import SingleFlight, StreamFlight
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"score": 42}
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("octocat", compute) for _ in range(10)))
+        again = await flight.do("octocat", compute)
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert all(r is results[0] for r in results)
+    assert again == {"score": 42}
+    assert len(runs) == 2
+    assert len(flight) == 0
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        impatient = asyncio.ensure_future(flight.do("k", compute))
+        patient = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(run()) == "done"
+
+def test_stream_subscribers_share_one_producer_and_late_joiners_replay():
+    flight = StreamFlight()
+    runs = []
+
+    async def produce():
+        runs.append(1)
+        for i in range(3):
+            await asyncio.sleep(0.02)
+            yield i
+
+    async def listen(delay=0):
+        await asyncio.sleep(delay)
+        return [item async for item in flight.subscribe("k", produce)]
+
+    async def run():
+        return await asyncio.gather(listen(), listen(), listen(delay=0.03))
+
+    assert asyncio.run(run()) == [[0, 1, 2]] * 3
+    assert len(runs) == 1
+    assert len(flight) == 0
+
+def test_stream_errors_reach_every_subscriber_and_leavers_do_not_stop_it():
+    flight = StreamFlight()
+    produced = []
+
+    async def produce():
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            produced.append(i)
+            yield i
+        raise RuntimeError("boom")
+
+    async def listen():
+        try:
+            return [item async for item in flight.subscribe("k", produce)]
+        except RuntimeError as e:
+            return str(e)
+
+    async def run():
+        leaver = asyncio.ensure_future(listen())
+        stayer = asyncio.ensure_future(listen())
+        await asyncio.sleep(0.015)
+        leaver.cancel()
+        return await stayer
+
+    assert asyncio.run(run()) == "boom"
+    assert produced == [0, 1, 2]